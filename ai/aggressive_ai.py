@@ -4,7 +4,8 @@
 基于简化但激进的策略，优先进攻而非防守
 """
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+import heapq
 import random
 from collections import Counter
 
@@ -13,6 +14,18 @@ from game.tile import Tile, TileType
 from game.player import Player
 from game.game_engine import GameAction
 
+# 同花色±2范围内的相邻位掩码（9位，不含自身），用于孤张判断
+_ADJ_MASK = tuple(
+    sum(1 << u for u in range(max(v - 2, 0), min(v + 2, 8) + 1) if u != v)
+    for v in range(9)
+)
+
+# 只与牌本身有关的打牌评分，按34索引预先算好：
+# 字牌相对安全+80，边张(1,9)+60，中张(3-7)要保留-20，2和8不加减
+_STATIC_DISCARD_SCORE = tuple(
+    [60.0, 0.0, -20.0, -20.0, -20.0, -20.0, -20.0, 0.0, 60.0] * 3 + [80.0] * 7
+)
+
 class AggressiveAI(BaseAI):
     """激进AI实现，专注于快速胡牌"""
     
@@ -32,59 +45,55 @@ class AggressiveAI(BaseAI):
             return random.choice(missing_suit_tiles)
         
         # 2. 快速评估策略：优先打出孤张和危险牌
+        counts34, suit_mask = self._build_hand_index(player)
         tile_scores = []
         for tile in available_tiles:
-            score = self._fast_evaluate_discard(player, tile)
+            score = self._fast_evaluate_discard(tile, counts34, suit_mask)
             tile_scores.append((tile, score))
         
-        # 按评分排序，选择最应该打出的
-        tile_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        # 添加少量随机性，但主要选择最优
+        # 添加少量随机性，但主要选择最优；只取需要的前几名，不对全部候选排序
         if random.random() < 0.9:
-            return tile_scores[0][0]
+            return max(tile_scores, key=lambda x: x[1])[0]
         else:
-            top_choices = tile_scores[:min(3, len(tile_scores))]
+            top_choices = heapq.nlargest(3, tile_scores, key=lambda x: x[1])
             return random.choice(top_choices)[0]
     
     def _get_missing_suit_tiles(self, player: Player, available_tiles: List[Tile]) -> List[Tile]:
         """获取缺门牌"""
-        if not hasattr(player, 'missing_suit') or not player.missing_suit:
+        missing_suit_id = self._missing_suit_id(player)
+        if missing_suit_id is None:
             return []
         
-        missing_suit_type = {
-            "万": TileType.WAN,
-            "筒": TileType.TONG,
-            "条": TileType.TIAO
-        }.get(player.missing_suit)
-        
-        if not missing_suit_type:
-            return []
-        
-        return [tile for tile in available_tiles if tile.tile_type == missing_suit_type]
+        return [tile for tile in available_tiles if tile.idx34 // 9 == missing_suit_id]
+    
+    @staticmethod
+    def _build_hand_index(player: Player) -> Tuple[List[int], List[int]]:
+        """
+        统计手牌：34格计数数组和每个数字花色的9位存在掩码
+        
+        每次决策只构建一次，供孤张、同牌数等判断复用
+        """
+        counts34 = [0] * 34
+        suit_mask = [0, 0, 0]
+        for t in player.hand_tiles:
+            counts34[t.idx34] += 1
+            if t.idx34 < 27:
+                suit_mask[t.idx34 // 9] |= 1 << (t.idx34 % 9)
+        return counts34, suit_mask
     
-    def _fast_evaluate_discard(self, player: Player, tile: Tile) -> float:
+    def _fast_evaluate_discard(self, tile: Tile, counts34: List[int], suit_mask: List[int]) -> float:
         """快速评估打牌优先级（越高越应该打出）"""
         score = 0.0
         
         # 1. 孤张牌优先打出
-        if self._is_isolated_tile(player, tile):
+        if self._is_isolated_tile(tile, counts34, suit_mask):
             score += 100.0
         
-        # 2. 字牌相对安全，可以打出
-        if tile.tile_type in [TileType.FENG, TileType.JIAN]:
-            score += 80.0
-        
-        # 3. 边张牌（1,9）相对安全
-        if tile.is_number_tile() and tile.value in [1, 9]:
-            score += 60.0
-        
-        # 4. 中张牌要保留（除非是孤张）
-        if tile.is_number_tile() and 3 <= tile.value <= 7:
-            score -= 20.0
+        # 2-4. 字牌相对安全可以打出、边张牌（1,9）相对安全、中张牌要保留（除非是孤张）
+        score += _STATIC_DISCARD_SCORE[tile.idx34]
         
         # 5. 如果有很多相同的牌，可以打出一张
-        same_count = sum(1 for t in player.hand_tiles if str(t) == str(tile))
+        same_count = counts34[tile.idx34]
         if same_count >= 3:
             score += 40.0
         elif same_count == 2:
@@ -92,23 +101,15 @@ class AggressiveAI(BaseAI):
         
         return score
     
-    def _is_isolated_tile(self, player: Player, tile: Tile) -> bool:
+    @staticmethod
+    def _is_isolated_tile(tile: Tile, counts34: List[int], suit_mask: List[int]) -> bool:
         """检查是否为孤张牌"""
-        if not tile.is_number_tile():
+        if tile.idx34 >= 27:
             # 字牌检查是否有对子或刻子
-            count = sum(1 for t in player.hand_tiles if str(t) == str(tile))
-            return count == 1
-        
-        # 数字牌检查周围是否有连接
-        same_suit_tiles = [t for t in player.hand_tiles if t.tile_type == tile.tile_type]
-        values = [t.value for t in same_suit_tiles]
-        
-        # 检查是否有相邻的牌
-        for v in values:
-            if v != tile.value and abs(v - tile.value) <= 2:
-                return False
+            return counts34[tile.idx34] == 1
         
-        return True
+        # 数字牌检查±2范围内是否有同花色的牌
+        return (suit_mask[tile.idx34 // 9] & _ADJ_MASK[tile.idx34 % 9]) == 0
     
     def decide_action(self, player: Player, available_actions: List[GameAction], 
                      context: Dict) -> Optional[GameAction]:
@@ -135,17 +136,7 @@ class AggressiveAI(BaseAI):
     
     def choose_missing_suit(self, player: Player) -> str:
         """选择缺门花色 - 选择数量最少的"""
-        suits = {"万": TileType.WAN, "筒": TileType.TONG, "条": TileType.TIAO}
-        suit_counts = {suit: 0 for suit in suits.keys()}
-        
-        # 统计每种花色的数量
-        for tile in player.hand_tiles:
-            for suit_name, suit_type in suits.items():
-                if tile.tile_type == suit_type:
-                    suit_counts[suit_name] += 1
-        
-        # 选择数量最少的花色作为缺门
-        return min(suit_counts.keys(), key=lambda x: suit_counts[x])
+        return self._fewest_suit(player)[0]
     
     def choose_exchange_tiles(self, player: Player, exchange_count: int) -> List[Tile]:
         """选择换牌 - 激进策略"""
@@ -156,11 +147,12 @@ class AggressiveAI(BaseAI):
         tiles_to_exchange = []
         
         # 按优先级排序：孤张 > 边张 > 字牌 > 其他
+        counts34, suit_mask = self._build_hand_index(player)
         tile_priorities = []
         for tile in player.hand_tiles:
             priority = 0
             
-            if self._is_isolated_tile(player, tile):
+            if self._is_isolated_tile(tile, counts34, suit_mask):
                 priority = 100
             elif tile.is_number_tile() and tile.value in [1, 9]:
                 priority = 80
@@ -7,10 +7,13 @@ from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Tuple
 import random
 
-from game.tile import Tile
+from game.tile import Tile, SUIT_NAMES, SUIT_ID_BY_NAME, count_suits
 from game.player import Player
 from game.game_engine import GameAction
 
+# 34种牌各占4位时，每格最低位的掩码
+_PACKED_LOW_BITS = sum(1 << (i << 2) for i in range(34))
+
 class BaseAI(ABC):
     """AI基类"""
     
@@ -34,9 +37,41 @@ class BaseAI(ABC):
         """选择缺门（四川麻将）"""
         pass
     
+    @staticmethod
+    def _missing_suit_id(player: Player) -> Optional[int]:
+        """玩家缺门花色的编号（0万 1筒 2条），未选择缺门时为None"""
+        return SUIT_ID_BY_NAME.get(getattr(player, 'missing_suit', None))
+    
+    @staticmethod
+    def _fewest_suit(player: Player) -> Tuple[str, int]:
+        """
+        手牌中张数最少的花色及其张数，张数相同时按万、筒、条的顺序取前者
+        
+        优先读取Player同步维护的hand_hist，每个花色是其中连续的9格
+        """
+        hand_hist = getattr(player, 'hand_hist', None)
+        if hand_hist is None:
+            suit_counts = count_suits(player.hand_tiles)
+        else:
+            suit_counts = [sum(hand_hist[base:base + 9]) for base in (0, 9, 18)]
+        suit_id = min(range(3), key=suit_counts.__getitem__)
+        return SUIT_NAMES[suit_id], suit_counts[suit_id]
+    
+    @staticmethod
+    def _count_tiles34(tiles: List[Tile]) -> List[int]:
+        """统计每种牌的数量（按34索引排列的直方图）"""
+        counts = [0] * 34
+        for tile in tiles:
+            counts[tile.idx34] += 1
+        return counts
+    
     def evaluate_hand(self, player: Player) -> Dict:
         """评估手牌"""
-        hand = player.hand_tiles
+        return self._evaluate_counts(self._count_tiles34(player.hand_tiles))
+    
+    @classmethod
+    def _evaluate_counts(cls, counts: List[int]) -> Dict:
+        """按34格直方图评估手牌"""
         evaluation = {
             "pairs": 0,
             "triplets": 0,
@@ -45,23 +80,13 @@ class BaseAI(ABC):
             "score": 0
         }
         
-        # 统计每种牌的数量
-        tile_counts = {}
-        for tile in hand:
-            key = str(tile)
-            tile_counts[key] = tile_counts.get(key, 0) + 1
-        
-        # 统计对子、刻子
-        for count in tile_counts.values():
-            if count == 2:
-                evaluation["pairs"] += 1
-            elif count >= 3:
-                evaluation["triplets"] += 1
-            elif count == 1:
-                evaluation["orphans"] += 1
+        # 统计对子、刻子、孤张
+        evaluation["pairs"] = counts.count(2)
+        evaluation["orphans"] = counts.count(1)
+        evaluation["triplets"] = 34 - evaluation["pairs"] - evaluation["orphans"] - counts.count(0)
         
         # 检查顺子可能性
-        evaluation["sequences"] = self._count_potential_sequences(hand)
+        evaluation["sequences"] = cls._count_sequences_from_counts(counts)
         
         # 计算评分
         evaluation["score"] = (
@@ -75,20 +100,18 @@ class BaseAI(ABC):
     
     def _count_potential_sequences(self, tiles: List[Tile]) -> int:
         """统计潜在顺子数量"""
+        return self._count_sequences_from_counts(self._count_tiles34(tiles))
+    
+    @staticmethod
+    def _count_sequences_from_counts(counts: List[int]) -> int:
+        """按34格直方图统计潜在顺子数量（每门按点数从小到大贪心取连续三张）"""
         sequences = 0
         
-        # 按花色分组
-        suits = {}
-        for tile in tiles:
-            if tile.is_number_tile():
-                suit = tile.tile_type.value
-                if suit not in suits:
-                    suits[suit] = []
-                suits[suit].append(tile.value)
-        
-        # 检查每个花色的顺子可能性
-        for suit, values in suits.items():
-            values.sort()
+        for base in (0, 9, 18):
+            # 直方图展开即为已排序的点数列表，无需再排序
+            values = []
+            for value in range(9):
+                values.extend([value] * counts[base + value])
             i = 0
             while i < len(values) - 2:
                 if values[i] + 1 == values[i + 1] and values[i + 1] + 1 == values[i + 2]:
@@ -99,8 +122,13 @@ class BaseAI(ABC):
         
         return sequences
     
-    def calculate_discard_priority(self, player: Player, tile: Tile) -> float:
-        """计算打牌优先级（数值越高越应该打出）"""
+    def calculate_discard_priority(self, player: Player, tile: Tile,
+                                   counts34: Optional[List[int]] = None) -> float:
+        """
+        计算打牌优先级（数值越高越应该打出）
+        
+        对多张候选牌打分时，调用方可以传入手牌的34格直方图，避免每张牌都重新扫描手牌
+        """
         priority = 0.0
         
         # 如果是缺门的牌，优先打出
@@ -108,12 +136,15 @@ class BaseAI(ABC):
             priority += 10.0
         
         # 孤张牌优先打出
-        same_tiles = [t for t in player.hand_tiles if str(t) == str(tile)]
-        if len(same_tiles) == 1:
+        if counts34 is None:
+            same_count = sum(1 for t in player.hand_tiles if t.idx34 == tile.idx34)
+        else:
+            same_count = counts34[tile.idx34]
+        if same_count == 1:
             priority += 5.0
         
         # 字牌相对优先打出（除非是刻子）
-        if tile.is_honor_tile() and len(same_tiles) < 3:
+        if tile.is_honor_tile() and same_count < 3:
             priority += 3.0
         
         # 边张（1,9）相对优先
@@ -121,7 +152,7 @@ class BaseAI(ABC):
             priority += 2.0
         
         # 随机因子
-        priority += random.uniform(0, 1)
+        priority += random.random()  # 与 uniform(0, 1) 取值相同，省去一层Python调用
         
         return priority
     
@@ -131,19 +162,25 @@ class BaseAI(ABC):
         if len(tiles) % 3 != 2:
             return False
         
-        # 统计牌的数量
-        tile_counts = {}
+        # 每种牌占4位打包成一个整数（同种牌不超过15张）
+        packed = 0
         for tile in tiles:
-            key = str(tile)
-            tile_counts[key] = tile_counts.get(key, 0) + 1
+            packed += 1 << (tile.idx34 << 2)
         
-        return self._check_basic_win_pattern(tile_counts)
+        return self._check_packed_win_pattern(packed)
     
-    def _check_basic_win_pattern(self, tile_counts: Dict[str, int]) -> bool:
-        """检查基本胡牌牌型"""
+    @staticmethod
+    def _check_packed_win_pattern(packed: int) -> bool:
+        """检查基本胡牌牌型（按位并行统计打包计数中的对子和刻子）"""
         # 简化版本：检查是否有合理的牌型分布
-        pairs = sum(1 for count in tile_counts.values() if count == 2)
-        triplets = sum(1 for count in tile_counts.values() if count >= 3)
+        bit0 = packed & _PACKED_LOW_BITS
+        bit1 = (packed >> 1) & _PACKED_LOW_BITS
+        bit2 = (packed >> 2) & _PACKED_LOW_BITS
+        bit3 = (packed >> 3) & _PACKED_LOW_BITS
+        
+        # 计数恰为2：0010；计数>=3：0011 或高两位有值
+        pairs = bin(bit1 & ~(bit0 | bit2 | bit3)).count("1")
+        triplets = bin((bit1 & bit0) | bit2 | bit3).count("1")
         
         # 基本要求：至少1个对子，其余为刻子或顺子
         return pairs >= 1 and (pairs + triplets) >= 5 
\ No newline at end of file
@@ -3,39 +3,135 @@
 使用蒙特卡洛树搜索（MCTS）的高级AI
 """
 
+import atexit
+import logging
 import math
+import os
+import pickle
 import random
 import copy
-from typing import List, Optional, Dict, Any
+import multiprocessing
+import multiprocessing.pool
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 
 from .base_ai import BaseAI
-from game.tile import Tile, TileType
+from game.tile import Tile, SUIT_ID_BY_NAME
 from game.player import Player, PlayerType
 from game.game_engine import GameEngine, GameAction, GameState
 
+_logger = logging.getLogger(__name__)
+
 # MCTS 超参数
 UCB_C = 2.0  # UCB1算法的探索常数, 增加探索权重
+PUCT_C = 2.0  # 子节点带先验概率时PUCT公式的探索常数
+
+# Zobrist 哈希表：同一父节点下到达同一局面的动作共用一个子节点（置换表）
+_zobrist_rng = random.Random(42)
+_ZOBRIST_HAND = [[[_zobrist_rng.getrandbits(64) for _ in range(5)] for _ in range(34)] for _ in range(4)]
+_ZOBRIST_DISCARD = [[_zobrist_rng.getrandbits(64) for _ in range(5)] for _ in range(34)]
+_ZOBRIST_LAST_DISCARD = [_zobrist_rng.getrandbits(64) for _ in range(34)]
+_ZOBRIST_TURN = [_zobrist_rng.getrandbits(64) for _ in range(4)]
+_ZOBRIST_WAITING = _zobrist_rng.getrandbits(64)
+del _zobrist_rng
+TRANSPOSITION_TABLE_SIZE = 1_000_000
+
+# 模拟中依次检查的响应动作
+_RESPONSE_ACTIONS = (GameAction.WIN, GameAction.GANG, GameAction.PENG)
+# 响应动作从手牌中取出的张数（明杠3张，碰2张）和胡牌的启发式得分
+_MELD_TILES_FROM_HAND = {GameAction.GANG: 3, GameAction.PENG: 2}
+_WIN_RESPONSE_SCORE = 10.0
+# 点数位图中与第i位（点数i+1）相距不超过2的窗口，用于判断孤张
+_ISOLATION_WINDOW = tuple(sum(1 << j for j in range(max(0, i - 2), min(9, i + 3))) for i in range(9))
+
+# 根并行：模拟次数达到该值且有多个CPU核心时，把模拟分给多个进程各自建树再合并根节点统计
+PARALLEL_MIN_SIMULATIONS = 256
+_WORKER_COUNT = os.cpu_count() or 1
+_pool = None
+# 根并行退回单进程搜索的错误：进程池启动失败、任务或结果无法在进程间传输
+# 工作进程内部抛出的其他异常属于真实bug，照常向上抛出
+_POOL_UNAVAILABLE_ERRORS = (OSError, pickle.PicklingError, multiprocessing.pool.MaybeEncodingError)
+
+
+def _get_pool():
+    """懒加载进程池，整个进程只创建一次以免每步都付出启动开销"""
+    global _pool
+    if _pool is None:
+        _pool = multiprocessing.Pool(_WORKER_COUNT)
+    return _pool
+
+
+def _shutdown_pool():
+    """关闭进程池并等待工作进程退出，进程结束时自动调用"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def _run_mcts_worker(args) -> List[tuple]:
+    """工作进程入口：用独立随机种子跑一棵MCTS树，返回根节点各子节点的统计"""
+    engine, possible_moves, simulations, player_id, is_discard_decision, seed = args
+    random.seed(seed)
+    ai = MctsAI(engine=engine)
+    ai.simulations_per_move = simulations
+    root_node = ai._run_mcts_serial(engine, possible_moves, is_discard_decision, player_id)
+    return [(c.action, c.player_id, c.visits, c.wins) for c in root_node.children]
 
 class MctsNode:
     """MCTS树中的节点"""
-    def __init__(self, parent: 'MctsNode' = None, action: Any = None, player_id: int = -1):
+    __slots__ = ('parent', 'action', 'children', 'visits', 'wins', 'player_id', 'untried_actions', 'prior')
+
+    def __init__(self, parent: 'MctsNode' = None, action: Any = None, player_id: int = -1,
+                 prior: Optional[float] = None):
         self.parent = parent
         self.action = action  # 导致这个状态的动作
-        self.children: List['MctsNode'] = []
+        self.prior = prior  # 启发式给出的先验概率P(s,a)，None表示没有先验
+        self.children: Sequence['MctsNode'] = ()  # 叶子节点不分配列表，首次add_child时再创建
         self.visits = 0
         self.wins = 0
         self.player_id = player_id
         self.untried_actions: Optional[List[Any]] = None
 
     def select_child(self) -> 'MctsNode':
-        """使用UBC1公式选择最佳子节点"""
-        best_child = max(self.children, key=lambda c: (c.wins / c.visits) + UCB_C * math.sqrt(math.log(self.visits) / c.visits))
+        """使用UBC1公式选择最佳子节点；子节点带先验概率时改用PUCT公式"""
+        if self.children[0].prior is not None:
+            return self._select_child_puct()
+
+        # ln(N) 对所有兄弟节点相同，只算一次
+        log_visits = math.log(self.visits)
+        sqrt = math.sqrt
+        best_child = None
+        best_ucb = -math.inf
+        for c in self.children:
+            ucb = (c.wins / c.visits) + UCB_C * sqrt(log_visits / c.visits)
+            if ucb > best_ucb:
+                best_ucb = ucb
+                best_child = c
+        return best_child
+
+    def _select_child_puct(self) -> 'MctsNode':
+        """PUCT：Q(s,a) + c * P(s,a) * sqrt(N) / (1 + n)"""
+        sqrt_visits = math.sqrt(self.visits)
+        best_child = None
+        best_score = -math.inf
+        for c in self.children:
+            score = (c.wins / c.visits) + PUCT_C * c.prior * sqrt_visits / (1 + c.visits)
+            if score > best_score:
+                best_score = score
+                best_child = c
         return best_child
 
-    def add_child(self, action: Any, player_id: int) -> 'MctsNode':
+    def add_child(self, action: Any, player_id: int, prior: Optional[float] = None) -> 'MctsNode':
         """添加一个新的子节点"""
-        child = MctsNode(parent=self, action=action, player_id=player_id)
-        self.children.append(child)
+        child = MctsNode(parent=self, action=action, player_id=player_id, prior=prior)
+        if self.children:
+            self.children.append(child)
+        else:
+            self.children = [child]
         return child
 
     def update(self, result: float):
@@ -62,10 +158,18 @@ class MctsAI(BaseAI):
         if not available_tiles:
             return player.hand_tiles[-1] if player.hand_tiles else None
 
-        # 如果只有一张牌可打
-        if len(available_tiles) == 1:
+        # 如果只有一种牌可打
+        if len(available_tiles) == 1 or len({t.idx34 for t in available_tiles}) == 1:
             return available_tiles[0]
 
+        # 手里还有缺门牌时必须先打缺门牌，直接按启发式优先级选择，不必搜索
+        missing_suit_id = SUIT_ID_BY_NAME.get(player.missing_suit)
+        if missing_suit_id is not None:
+            missing_tiles = [t for t in available_tiles if t.idx34 // 9 == missing_suit_id]
+            if missing_tiles:
+                counts34 = self._count_tiles34(player.hand_tiles)
+                return max(missing_tiles, key=lambda t: self.calculate_discard_priority(player, t, counts34))
+
         # MCTS的核心逻辑
         root_node = self._run_mcts(self.engine, available_tiles, is_discard_decision=True, player_id=player.player_id)
         
@@ -88,9 +192,9 @@ class MctsAI(BaseAI):
         if GameAction.WIN in available_actions:
             return GameAction.WIN
 
-        # 如果只有PASS可选，直接返回
-        if len(available_actions) == 1 and GameAction.PASS in available_actions:
-            return GameAction.PASS
+        # 只有一种动作可选（例如只有PASS，或只能杠）时直接返回
+        if len(set(available_actions)) == 1:
+            return available_actions[0]
 
         # MCTS核心逻辑
         root_node = self._run_mcts(self.engine, available_actions, is_discard_decision=False, player_id=player.player_id)
@@ -103,12 +207,135 @@ class MctsAI(BaseAI):
         return best_child.action
 
     def _run_mcts(self, engine: GameEngine, possible_moves: List[Any], is_discard_decision: bool, player_id: int) -> MctsNode:
-        """运行MCTS算法"""
+        """运行MCTS算法，模拟次数足够且有多核时使用根并行"""
+        if len(possible_moves) <= 1:
+            # 没有可比较的动作，直接返回只含该动作的根节点
+            root_node = MctsNode(player_id=player_id)
+            root_node.untried_actions = []
+            if possible_moves:
+                root_node.add_child(action=possible_moves[0], player_id=player_id).update(0.0)
+            return root_node
+
+        if self.simulations_per_move >= PARALLEL_MIN_SIMULATIONS and _WORKER_COUNT > 1:
+            root_node = self._run_mcts_parallel(engine, possible_moves, is_discard_decision, player_id)
+            if root_node is not None:
+                return root_node
+        return self._run_mcts_serial(engine, possible_moves, is_discard_decision, player_id)
+
+    def _run_mcts_parallel(self, engine: GameEngine, possible_moves: List[Any], is_discard_decision: bool, player_id: int) -> Optional[MctsNode]:
+        """
+        根并行MCTS：每个工作进程独立建树，按动作累加根节点子节点的访问次数和胜场
+        
+        Returns:
+            合并后的根节点；进程池不可用时返回None，由调用方退回单进程搜索
+        """
+        sim_engine = self._new_sim_engine(engine)
+
+        per_worker, extra = divmod(self.simulations_per_move, _WORKER_COUNT)
+        tasks = [
+            (sim_engine, possible_moves, per_worker + (1 if i < extra else 0),
+             player_id, is_discard_decision, random.getrandbits(32))
+            for i in range(_WORKER_COUNT)
+        ]
+        try:
+            results = _get_pool().map(_run_mcts_worker, tasks)
+        except _POOL_UNAVAILABLE_ERRORS as e:
+            _logger.warning(f"根并行MCTS不可用，退回单进程搜索: {e!r}")
+            return None
+
+        root_node = MctsNode(player_id=player_id)
+        root_node.untried_actions = []
+        merged: Dict[Any, MctsNode] = {}
+        for children in results:
+            for action, child_player_id, visits, wins in children:
+                child = merged.get(action)
+                if child is None:
+                    child = merged[action] = root_node.add_child(action=action, player_id=child_player_id)
+                child.visits += visits
+                child.wins += wins
+                root_node.visits += visits
+                root_node.wins += wins
+        return root_node
+
+    @staticmethod
+    def _detach_callbacks(sim_engine: GameEngine):
+        """清空模拟引擎上的回调：它们指向界面对象，既无法跨进程传递，也不应在模拟中触发"""
+        sim_engine.on_game_state_changed = None
+        sim_engine.on_player_action = None
+        sim_engine.on_game_over = None
+        sim_engine.on_ai_turn_start = None
+        for p in sim_engine.players:
+            p.on_tile_exchange_start = None
+            p.on_missing_suit_selection_start = None
+
+    def _new_sim_engine(self, engine: GameEngine) -> GameEngine:
+        """深拷贝真实引擎作为模拟引擎，并清空其回调"""
+        sim_engine = copy.deepcopy(engine)
+        self._detach_callbacks(sim_engine)
+        return sim_engine
+
+    @staticmethod
+    def _zobrist_hash(engine: GameEngine) -> int:
+        """计算局面的Zobrist哈希：各家手牌、弃牌池、当前玩家、最后打出的牌及是否等待响应"""
+        h = _ZOBRIST_TURN[engine.current_player_index]
+        for pid, p in enumerate(engine.players):
+            counts = [0] * 34
+            for tile in p.hand_tiles:
+                counts[tile.idx34] += 1
+            table = _ZOBRIST_HAND[pid]
+            for idx, count in enumerate(counts):
+                if count:
+                    h ^= table[idx][min(count, 4)]
+
+        counts = [0] * 34
+        for tile, _ in engine.discard_pool:
+            counts[tile.idx34] += 1
+        for idx, count in enumerate(counts):
+            if count:
+                h ^= _ZOBRIST_DISCARD[idx][min(count, 4)]
+
+        if engine.last_discarded_tile is not None:
+            h ^= _ZOBRIST_LAST_DISCARD[engine.last_discarded_tile.idx34]
+        if engine.state == GameState.WAITING_ACTION:
+            h ^= _ZOBRIST_WAITING
+        return h
+
+    def _run_mcts_serial(self, engine: GameEngine, possible_moves: List[Any], is_discard_decision: bool, player_id: int) -> MctsNode:
+        """在当前进程内运行MCTS算法"""
         root_node = MctsNode(player_id=player_id)
         root_node.untried_actions = possible_moves[:]
+        # 置换表：(父节点, 局面哈希) -> 子节点，只合并同一父节点下的重复局面（如打出两张相同的牌），
+        # 保证反向传播沿实际走过的路径
+        transposition_table: Dict[Tuple[int, int], MctsNode] = {}
+
+        # 每次决策只深拷贝一次，之后每次模拟前回滚到快照
+        # 碰/杠/过的决策用手牌评分变化作为根节点动作的先验
+        priors = None
+        if not is_discard_decision and 0 <= player_id < len(engine.players):
+            player = engine.players[player_id]
+            probs = self._softmax(self._response_scores(player, possible_moves, engine.last_discarded_tile))
+            priors = dict(zip(possible_moves, probs))
+
+        sim_engine = self._new_sim_engine(engine)
+        snapshot = sim_engine.snapshot()
+        self._run_simulations(sim_engine, snapshot, root_node, is_discard_decision, player_id,
+                              transposition_table, priors)
+
+        return root_node
+
+    def _run_simulations(self, sim_engine: GameEngine, snapshot: Dict[str, Any], root_node: MctsNode,
+                         is_discard_decision: bool, player_id: int, transposition_table: Dict[Tuple[int, int], MctsNode],
+                         priors: Optional[Dict[Any, float]] = None):
+        """在sim_engine上执行simulations_per_move次选择、扩展、模拟、反向传播"""
+        # restore只改写玩家的状态，不替换玩家列表本身，可以在循环外绑定
+        players = sim_engine.players
+        num_players = len(players)
+        execute = sim_engine.execute_player_action
+        # 出牌决策树的第一层动作都是当前玩家的出牌动作
+        discard_actor = players[player_id] if is_discard_decision and 0 <= player_id < num_players else None
 
         for _ in range(self.simulations_per_move):
-            sim_engine = copy.deepcopy(engine)
+            sim_engine.restore(snapshot)
             node = root_node
 
             # 1. 选择 (Selection)
@@ -116,19 +343,14 @@ class MctsAI(BaseAI):
                 node = node.select_child()
                 # 将此动作应用于模拟引擎以到达下一状态
                 actor_id = node.parent.player_id
-                if 0 <= actor_id < len(sim_engine.players):
-                    actor = sim_engine.players[actor_id]
+                if 0 <= actor_id < num_players:
+                    actor = discard_actor or players[actor_id]
                     action_to_apply = node.action
                     
-                    if is_discard_decision:
-                        # 对于出牌决策树，所有第一层动作都是当前玩家的出牌动作
-                        if 0 <= player_id < len(sim_engine.players):
-                            actor = sim_engine.players[player_id]
-                    
                     if isinstance(action_to_apply, Tile):
-                        sim_engine.execute_player_action(actor, GameAction.DISCARD, action_to_apply)
+                        execute(actor, GameAction.DISCARD, action_to_apply)
                     else: # GameAction
-                        sim_engine.execute_player_action(actor, action_to_apply)
+                        execute(actor, action_to_apply)
 
             # 2. 扩展 (Expansion)
             if node.untried_actions:
@@ -136,18 +358,29 @@ class MctsAI(BaseAI):
                 node.untried_actions.remove(action)
                 
                 actor_id = node.player_id
-                if 0 <= actor_id < len(sim_engine.players):
-                    actor = sim_engine.players[actor_id]
+                applied = False
+                if 0 <= actor_id < num_players:
+                    actor = players[actor_id]
                     
                     # 应用动作
                     if isinstance(action, Tile): # is discard
-                        sim_engine.execute_player_action(actor, GameAction.DISCARD, action)
+                        applied = execute(actor, GameAction.DISCARD, action)
                     else: # is GameAction
-                        sim_engine.execute_player_action(actor, action)
-
-                next_player_in_sim = sim_engine.get_current_player()
-                child_player_id = next_player_in_sim.player_id if next_player_in_sim else -1
-                node = node.add_child(action=action, player_id=child_player_id)
+                        applied = execute(actor, action)
+
+                # 只有动作确实改变了局面才查置换表，未生效的动作各自保留节点
+                # 表按父节点区分，命中的只会是当前节点的子节点
+                tt_key = (id(node), self._zobrist_hash(sim_engine)) if applied else None
+                existing = transposition_table.get(tt_key) if applied else None
+                if existing is not None:
+                    node = existing
+                else:
+                    next_player_in_sim = sim_engine.get_current_player()
+                    child_player_id = next_player_in_sim.player_id if next_player_in_sim else -1
+                    prior = priors.get(action) if priors and node is root_node else None
+                    node = node.add_child(action=action, player_id=child_player_id, prior=prior)
+                    if applied and len(transposition_table) < TRANSPOSITION_TABLE_SIZE:
+                        transposition_table[tt_key] = node
 
             # 3. 模拟 (Simulation)
             result = self._simulate_random_game(sim_engine, root_node.player_id)
@@ -156,8 +389,6 @@ class MctsAI(BaseAI):
             while node is not None:
                 node.update(result)
                 node = node.parent
-        
-        return root_node
 
     def _replay_to_node(self, sim_engine: GameEngine, node: MctsNode):
         """此方法已废弃，逻辑合并到 _run_mcts 中"""
@@ -165,150 +396,219 @@ class MctsAI(BaseAI):
 
     def _simulate_random_game(self, sim_engine: GameEngine, original_player_id: int) -> float:
         """从当前状态开始进行一次快速的启发式游戏模拟"""
+        players = sim_engine.players
+        rule = sim_engine.rule
+        execute = sim_engine.execute_player_action
+        can_act = sim_engine.can_player_action
+        rand = random.random
+
         # 模拟限制，防止无限循环
         for _ in range(150): # 一局游戏通常不会超过150个动作
             if sim_engine.is_game_over():
                 break
 
             current_player = sim_engine.get_current_player()
-            if not current_player or getattr(current_player, 'is_winner', False):
+            if not current_player or current_player.is_winner:
                 sim_engine.next_turn()
                 continue
             
-            game_state_val = sim_engine.state.value
+            state = sim_engine.state
 
-            if game_state_val == 'waiting_action':
+            if state is GameState.WAITING_ACTION:
                 # 检查是否有玩家可以响应
                 action_taken = False
-                for p in sim_engine.players:
-                    if p == sim_engine.last_discard_player or getattr(p, 'is_winner', False):
+                discard_player = sim_engine.last_discard_player
+                for p in players:
+                    if p == discard_player or p.is_winner:
                         continue
                     
-                    possible_actions = [act for act in [GameAction.WIN, GameAction.GANG, GameAction.PENG] if sim_engine.can_player_action(p, act)]
-                    if possible_actions:
-                        # 在模拟中，让AI倾向于执行动作以探索更多可能性
-                        if random.random() < 0.75: # 75%的概率执行动作
-                            # 优先胡牌
-                            chosen_action = GameAction.WIN if GameAction.WIN in possible_actions else random.choice(possible_actions)
-                            sim_engine.execute_player_action(p, chosen_action)
+                    possible_actions = [act for act in _RESPONSE_ACTIONS if can_act(p, act)]
+                    if not possible_actions:
+                        continue
+                    if GameAction.WIN in possible_actions:
+                        # 能胡时75%的概率胡牌
+                        if rand() < 0.75:
+                            execute(p, GameAction.WIN)
                             action_taken = True
                             break # 一次只处理一个响应
+                        continue
+
+                    # 碰/杠与过按手牌评分变化做softmax采样，而不是固定概率均匀选择
+                    possible_actions.append(GameAction.PASS)
+                    probs = self._softmax(self._response_scores(p, possible_actions, sim_engine.last_discarded_tile))
+                    chosen_action = self._sample_index(probs, rand())
+                    if possible_actions[chosen_action] is not GameAction.PASS:
+                        execute(p, possible_actions[chosen_action])
+                        action_taken = True
+                        break # 一次只处理一个响应
                 
                 if not action_taken:
                     # 如果没有任何人行动，则需要一个玩家来"过"
-                    passer = next((p for p in sim_engine.players if p != sim_engine.last_discard_player and not getattr(p, 'is_winner', False)), None)
+                    passer = next((p for p in players if p != discard_player and not p.is_winner), None)
                     if passer:
-                        sim_engine.execute_player_action(passer, None) # None代表PASS
+                        execute(passer, None) # None代表PASS
                     else:
                         # 如果找不到passer（例如，只剩一个玩家），让引擎自己推进
                         sim_engine.next_turn()
 
-            elif game_state_val == 'playing':
+            elif state is GameState.PLAYING:
                 # 检查自摸
-                if sim_engine.can_player_action(current_player, GameAction.WIN):
-                     sim_engine.execute_player_action(current_player, GameAction.WIN)
+                if can_act(current_player, GameAction.WIN):
+                     execute(current_player, GameAction.WIN)
                      continue
 
-                # 使用启发式方法选择出牌，而不是纯随机
-                available_discards = [t for t in current_player.hand_tiles if sim_engine.rule.can_discard(current_player, t)]
+                # 使用启发式方法选择出牌，而不是纯随机；同种牌能否打出只判断一次
+                hand_tiles = current_player.hand_tiles
+                discardable = {}
+                available_discards = []
+                for t in hand_tiles:
+                    allowed = discardable.get(t.idx34)
+                    if allowed is None:
+                        allowed = discardable[t.idx34] = rule.can_discard(current_player, t)
+                    if allowed:
+                        available_discards.append(t)
                 if not available_discards:
-                    available_discards = current_player.hand_tiles
+                    available_discards = hand_tiles
                 
                 if available_discards:
                     discard_tile = self._choose_best_discard_for_simulation(current_player, available_discards)
-                    sim_engine.execute_player_action(current_player, GameAction.DISCARD, discard_tile)
+                    execute(current_player, GameAction.DISCARD, discard_tile)
                 else:
                     # 无法出牌，游戏卡死，结束模拟
                     break
         
-        # 游戏结束，评估结果
-        winners = [p for p in sim_engine.players if getattr(p, 'is_winner', False)]
-        if not winners and sim_engine.is_game_over(): # 流局
-            return 0.5
-        if any(winner.player_id == original_player_id for winner in winners):
-            return 1.0  # 赢了
-        elif winners:
+        # 游戏结束，评估结果（只有4名玩家，一次遍历即可，无需构造胜者列表）
+        has_winner = False
+        for p in players:
+            if p.is_winner:
+                if p.player_id == original_player_id:
+                    return 1.0  # 赢了
+                has_winner = True
+        if has_winner:
             return 0.0 # 输了
-        else:
-            return 0.2  # 游戏未结束但模拟终止，给一个较低的奖励
+        if sim_engine.is_game_over(): # 流局
+            return 0.5
+        return 0.2  # 游戏未结束但模拟终止，给一个较低的奖励
+
+    def _response_scores(self, player: Player, actions: List[GameAction], tile: Optional[Tile]) -> List[float]:
+        """
+        响应动作的启发式得分：动作后的手牌评分加上新副露（按刻子计3分）减去动作前的评分
+        
+        过牌得分为0，胡牌直接给一个较高的分数。
+        """
+        counts = [0] * 34
+        for t in player.hand_tiles:
+            counts[t.idx34] += 1
+        before = self._evaluate_counts(counts)["score"]
+
+        scores = []
+        for action in actions:
+            if action == GameAction.WIN:
+                scores.append(_WIN_RESPONSE_SCORE)
+            elif action in _MELD_TILES_FROM_HAND and tile is not None:
+                after = counts[:]
+                after[tile.idx34] = max(0, after[tile.idx34] - _MELD_TILES_FROM_HAND[action])
+                scores.append(self._evaluate_counts(after)["score"] + 3 - before)
+            else:
+                scores.append(0.0)
+        return scores
+
+    @staticmethod
+    def _softmax(scores: List[float]) -> List[float]:
+        """把得分转换为概率分布"""
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    @staticmethod
+    def _sample_index(probs: List[float], r: float) -> int:
+        """按概率分布和[0, 1)内的随机数r采样一个下标"""
+        cumulative = 0.0
+        for i, prob in enumerate(probs):
+            cumulative += prob
+            if r < cumulative:
+                return i
+        return len(probs) - 1
 
     def _choose_best_discard_for_simulation(self, player: Player, available_tiles: List[Tile]) -> Tile:
         """
         在模拟中使用的轻量级出牌选择逻辑。
         借鉴SimpleAI的思路，但更简化以提高速度。
         """
-        priorities = []
+        # 手牌计数和每门的点数位图只统计一次
+        hand_counts = [0] * 34
+        suit_masks = [0, 0, 0]
+        for t in player.hand_tiles:
+            idx = t.idx34
+            hand_counts[idx] += 1
+            if idx < 27:
+                suit_masks[idx // 9] |= 1 << (idx % 9)
+        # 字牌的value都是0，按"同类型同点数"计数即同为风牌（或同为箭牌）的张数
+        feng_count = sum(hand_counts[27:31])
+        jian_count = sum(hand_counts[31:34])
+        missing_suit = player.missing_suit
+        rand = random.random
+
+        # 同种牌的启发式优先级相同，每种只算一次
+        base_priorities = {}
+        best_tile = None
+        best_priority = -math.inf
         for tile in available_tiles:
-            priority = 0.0
-            
-            # 1. 缺门牌最优先
-            if player.missing_suit and tile.tile_type.value == player.missing_suit:
-                priority += 100
-            
-            # 2. 孤张字牌优先
-            if tile.is_honor_tile():
-                count = sum(1 for t in player.hand_tiles if t.value == tile.value and t.tile_type == tile.tile_type)
-                if count == 1:
-                    priority += 50
-            
-            # 3. 孤张幺九牌
-            if tile.is_terminal():
-                count = sum(1 for t in player.hand_tiles if t.value == tile.value and t.tile_type == tile.tile_type)
-                if count == 1:
-                    priority += 30
-            
-            # 4. 普通孤张牌
-            if tile.is_number_tile() and not tile.is_terminal():
-                count = sum(1 for t in player.hand_tiles if t.value == tile.value and t.tile_type == tile.tile_type)
-                is_isolated = True
-                for t in player.hand_tiles:
-                    if t.tile_type == tile.tile_type and abs(t.value - tile.value) <= 2:
-                        is_isolated = False
-                        break
-                if is_isolated and count == 1:
-                    priority += 20
+            idx = tile.idx34
+            priority = base_priorities.get(idx)
+            if priority is None:
+                priority = 0.0
+                
+                # 1. 缺门牌最优先
+                if missing_suit and tile.tile_type.value == missing_suit:
+                    priority += 100
+                
+                if idx >= 27:
+                    # 2. 孤张字牌优先；3. 字牌同时算作幺九牌
+                    if (feng_count if idx < 31 else jian_count) == 1:
+                        priority += 50
+                        priority += 30
+                elif hand_counts[idx] == 1:
+                    value_bit = idx % 9
+                    if value_bit == 0 or value_bit == 8:
+                        # 3. 孤张幺九牌
+                        priority += 30
+                    elif not suit_masks[idx // 9] & _ISOLATION_WINDOW[value_bit]:
+                        # 4. 普通孤张牌（同花色±2以内没有任何牌）
+                        priority += 20
+                base_priorities[idx] = priority
             
-            priorities.append((tile, priority + random.random())) # 加一点随机性避免总是打同样的牌
+            priority += rand() # 加一点随机性避免总是打同样的牌
+            if priority > best_priority:
+                best_priority = priority
+                best_tile = tile
             
-        if not priorities:
+        if best_tile is None:
             return random.choice(available_tiles)
 
-        priorities.sort(key=lambda x: x[1], reverse=True)
-        return priorities[0][0]
+        return best_tile
 
     def choose_missing_suit(self, player: Player) -> str:
         """
         选择缺门（四川麻将）
         MCTS不适合用于此决策，因此我们使用简单AI的逻辑：选择牌数最少的花色。
         """
-        suit_counts = {TileType.WAN: 0, TileType.TONG: 0, TileType.TIAO: 0}
-        for tile in player.hand_tiles:
-            if tile.tile_type in suit_counts:
-                suit_counts[tile.tile_type] += 1
-        
-        # 找出数量最少的花色
-        min_suit = min(suit_counts, key=suit_counts.get)
-        
-        # 从 TileType 枚举值转换为中文字符串
-        suit_map = {
-            TileType.WAN: "万",
-            TileType.TONG: "筒",
-            TileType.TIAO: "条"
-        }
-        return suit_map[min_suit]
+        return self._fewest_suit(player)[0]
 
     def choose_exchange_tiles(self, player: Player) -> List[Tile]:
         """
         选择换三张的牌
         MCTS不适合用于此决策，使用简单AI的逻辑：选择数量最多的同花色牌中的三张。
         """
-        suit_counts = {TileType.WAN: [], TileType.TONG: [], TileType.TIAO: []}
+        # 一次遍历按花色编号（idx34 // 9）分组：0万，1筒，2条
+        tiles_by_suit = ([], [], [])
         for tile in player.hand_tiles:
-            if tile.tile_type in suit_counts:
-                suit_counts[tile.tile_type].append(tile)
+            if tile.idx34 < 27:
+                tiles_by_suit[tile.idx34 // 9].append(tile)
 
         # 过滤掉牌数少于3的花色
-        valid_suits = {suit: tiles for suit, tiles in suit_counts.items() if len(tiles) >= 3}
+        valid_suits = [suit_id for suit_id in range(3) if len(tiles_by_suit[suit_id]) >= 3]
 
         if not valid_suits:
             # 如果没有任何花色超过3张，则无法完成换牌，这是一个异常情况
@@ -316,9 +616,9 @@ class MctsAI(BaseAI):
             return random.sample(player.hand_tiles, 3)
 
         # 找到牌数最多的花色
-        max_suit = max(valid_suits, key=lambda suit: len(valid_suits[suit]))
+        max_suit = max(valid_suits, key=lambda suit_id: len(tiles_by_suit[suit_id]))
 
         # 从该花色中选择三张牌（例如，选择价值最低的三张）
-        tiles_to_exchange = sorted(valid_suits[max_suit], key=lambda t: t.value)[:3]
+        tiles_to_exchange = sorted(tiles_by_suit[max_suit], key=lambda t: t.value)[:3]
         
         return tiles_to_exchange 
\ No newline at end of file
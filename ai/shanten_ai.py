@@ -9,21 +9,90 @@
 4. 结合四川麻将特殊规则
 """
 
-from typing import List, Literal, Optional, Dict, Tuple, Set, Union
+from typing import List, Literal, Optional, Dict, Tuple, Set, Union, Sequence
+import heapq
+import logging
 import random
-from collections import defaultdict, Counter
-from copy import deepcopy
 
 from rules.base_rule import BaseRule
 
 from .base_ai import BaseAI
-from game.tile import Tile, TileType, FengType, JianType
+from game.tile import Tile, TileType, FengType, JianType, ALL_TILES, SUIT_NAMES, SUIT_ID_BY_NAME
 from game.player import Player
 from game.game_engine import GameAction
 
+# 出牌分析的调试输出，默认不开启，需要时把该logger调到DEBUG级别
+_logger = logging.getLogger(__name__)
+
+# 国士无双的13种牌在34索引中的位置：一九万、一九筒、一九条、东南西北、中发白
+_KOKUSHI_INDICES = (0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33)
+
+# 数字牌按点数(1-9)的基础危险度：456最危险，37次之，28有一定危险，19边张相对安全
+# 字牌中三元牌较危险(0.6)，风牌中等危险(0.3)；按34索引展开成一张表
+_BASE_DANGER_BY_INDEX = (0.1, 0.3, 0.5, 0.7, 0.7, 0.7, 0.5, 0.3, 0.1) * 3 + (0.3,) * 4 + (0.6,) * 3
+
+# 各项防守理论对危险度的折减系数
+_SUJI_DANGER_FACTOR = 0.7  # 筋牌
+_KABE_DANGER_FACTOR = 0.8  # 3张可见的准壁
+_EARLY_DANGER_FACTOR = 0.6  # 早巡相关牌
+_UNSEEN_DANGER_BONUS = 0.2  # 生张额外危险度
+
+# 牌河和可见牌都为空（开局）时没有任何折减，危险度只取决于牌本身
+_COLD_DANGER_BY_INDEX = tuple(min(1.0, max(0.0, danger + _UNSEEN_DANGER_BONUS)) for danger in _BASE_DANGER_BY_INDEX)
+
+# 每张数字牌的筋牌（同花色相隔3的牌）在34索引中的位置，字牌没有筋牌
+_SUJI_INDICES = tuple(
+    frozenset(base + rank for rank in range(9) if rank != offset and (rank - offset) % 3 == 0)
+    for base in (0, 9, 18) for offset in range(9)
+) + (frozenset(),) * 7
+
+# 按34索引的简化危险牌判断：中张(3-7)和三元牌危险，边张(1,2,8,9)和风牌相对安全
+_DANGEROUS_BY_INDEX = tuple(
+    [False, False, True, True, True, True, True, False, False] * 3 + [False] * 4 + [True] * 3
+)
+
+# 九莲宝灯基本形态1112345678999在单花色9格中的张数
+_JIULIAN_EXPECTED = (3, 1, 1, 1, 1, 1, 1, 1, 3)
+
+# 一向听类型对应的顶峰理论加分
+_ONE_SHANTEN_BONUS = {
+    "余剩牌形": 10.0,
+    "完全一向听": 20.0,
+    "无雀头一向听": 30.0,
+    "双靠张一向听": 40.0,
+    "七对子一向听": 10.0,
+    "七对子与面子手复合一向听": 20.0,
+    "国士一向听": 10.0,
+}
+
+# 单花色打包键（每格4位）中点数r前后两格的掩码：这些格都为0时，摸到r只能作为孤张，不改变分解结果
+_SUIT_NEIGHBOUR_NIBBLES = tuple(
+    sum(0xF << (i << 2) for i in range(max(0, r - 2), min(9, r + 3))) for r in range(9)
+)
+
+# 34索引对应的牌key，与_count_tiles和进张字典使用的key格式一致
+_TILE_KEYS = (
+    [(suit, value) for suit in (TileType.WAN, TileType.TONG, TileType.TIAO) for value in range(1, 10)]
+    + [(TileType.FENG, feng_type) for feng_type in FengType]
+    + [(TileType.JIAN, jian_type) for jian_type in JianType]
+)
+# key到牌对象的映射，ALL_TILES与_TILE_KEYS同为34索引顺序，牌对象不可变可直接复用
+_TILE_BY_KEY = dict(zip(_TILE_KEYS, ALL_TILES))
+# key到34索引的映射，用于按进张字典的key查计数数组
+_INDEX_BY_KEY = {key: idx for idx, key in enumerate(_TILE_KEYS)}
+
 class ShantenCalculator:
     """向听数计算器"""
     
+    # 单花色组合缓存：键为9格计数打包成的整数（每格4位），值为去重后的组合列表
+    _suit_cache: Dict[int, List[Tuple[int, int, int]]] = {}
+    _SUIT_CACHE_MAX = 200_000
+    
+    # 整手牌向听数缓存：键为 (34格计数的bytes, 副露数, 向听类型)
+    # 同一回合内打牌分析、顶峰理论、动作评估会反复计算相同的手牌
+    _shanten_cache: Dict[Tuple[bytes, int, str], int] = {}
+    _SHANTEN_CACHE_MAX = 100_000
+    
     @staticmethod
     def calculate_shanten(
         tiles: List[Tile], 
@@ -44,89 +113,127 @@ class ShantenCalculator:
         if not tiles:
             return 13
         
-        # 统计牌的数量
-        tile_counts = ShantenCalculator._count_tiles(tiles)
+        # 统计牌的数量（34格计数数组）
+        tile_counts = ShantenCalculator._count_tiles34(tiles)
+        return ShantenCalculator._calculate_shanten_from_counts(tile_counts, melds_count, shentan_type)
+    
+    @staticmethod
+    def _calculate_shanten_from_counts(
+        tile_counts: List[int], 
+        melds_count: int = 0, 
+        shentan_type: Literal["general", "pairs", "kokushi"] = "general"
+    ) -> int:
+        """根据34格计数数组计算向听数，供需要原地增减计数的调用方使用"""
+        if not any(tile_counts):
+            return 13
+        
+        cache_key = (bytes(tile_counts), melds_count, shentan_type)
+        cache = ShantenCalculator._shanten_cache
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # 根据向听数类型计算向听数
         if shentan_type == "general":
-            general_shanten = ShantenCalculator._calculate_standard_shanten(tile_counts, melds_count)
-            return general_shanten
+            shanten = ShantenCalculator._calculate_standard_shanten(tile_counts, melds_count)
         elif shentan_type == "pairs":
-            pairs_shanten = ShantenCalculator._calculate_seven_pairs_shanten(tile_counts)
-            return pairs_shanten
+            shanten = ShantenCalculator._calculate_seven_pairs_shanten(tile_counts)
         elif shentan_type == "kokushi":
-            kokushi_shanten = ShantenCalculator._calculate_kokushi_shanten(tile_counts)
-            return kokushi_shanten
-
-        # 国士无双向听数
-        # kokushi_shanten = ShantenCalculator._calculate_kokushi_shanten(tile_counts)
+            shanten = ShantenCalculator._calculate_kokushi_shanten(tile_counts)
+        else:
+            raise ValueError(f"未知的向听数类型: {shentan_type}")
         
-        # 返回最小值
-        return min(general_shanten, pairs_shanten)
+        if len(cache) >= ShantenCalculator._SHANTEN_CACHE_MAX:
+            cache.clear()
+        cache[cache_key] = shanten
+        return shanten
     
     @staticmethod
     def _count_tiles(tiles: List[Tile]) -> Dict[Tuple, int]:
-        """统计牌的数量"""
-        tile_counts = defaultdict(int)
+        """统计牌的数量，返回 {牌key: 张数}（先按34索引计数，再映射回key）"""
+        counts = ShantenCalculator._count_tiles34(tiles)
+        return {_TILE_KEYS[idx]: count for idx, count in enumerate(counts) if count}
+    
+    @staticmethod
+    def _count_tiles34(tiles: List[Tile]) -> List[int]:
+        """统计牌的数量，返回按34索引排列的计数数组"""
+        counts = [0] * 34
         for tile in tiles:
-            if tile.tile_type == TileType.FENG:
-                key = (tile.tile_type, tile.feng_type)
-            elif tile.tile_type == TileType.JIAN:
-                key = (tile.tile_type, tile.jian_type)
-            else:
-                key = (tile.tile_type, tile.value)
-            tile_counts[key] += 1
-        return dict(tile_counts)
+            counts[tile.idx34] += 1
+        return counts
     
     @staticmethod
-    def _calculate_standard_shanten(
-            tile_counts: Dict[Tuple[TileType, Union[int, FengType, JianType]], int], 
-            melds_count: int = 0
-    ) -> int:
+    def _player_counts34(player: Player) -> List[int]:
+        """玩家手牌的34索引计数：复制Player同步维护的hand_hist，不再重新统计手牌"""
+        hand_hist = getattr(player, 'hand_hist', None)
+        if hand_hist is None:
+            return ShantenCalculator._count_tiles34(player.hand_tiles)
+        return hand_hist.copy()
+    
+    @staticmethod
+    def _calculate_standard_shanten(tile_counts: List[int], melds_count: int = 0) -> int:
         """计算标准型向听数（4面子+1对子）"""
-        # 简化实现：使用经典的向听数算法
-        counts = deepcopy(tile_counts)
-        
-        # 分别处理字牌和数字牌
+        # 处理数字牌，每个花色是计数数组中连续的9格
+        suit_combinations = [
+            ShantenCalculator._get_suit_combinations(tile_counts[base:base + 9])
+            for base in (0, 9, 18)
+        ]
+        return ShantenCalculator._combine_standard_shanten(
+            suit_combinations, ShantenCalculator._get_honor_groups(tile_counts), melds_count
+        )
+    
+    @staticmethod
+    def _get_honor_groups(tile_counts: List[int]) -> Tuple[int, int]:
+        """处理字牌（27-33），字牌只能组成刻子和对子，返回 (刻子数, 对子数)"""
         honor_melds = 0
         honor_pairs = 0
+        for count in tile_counts[27:]:
+            if count >= 3:
+                honor_melds += count // 3
+                count = count % 3
+            if count == 2:
+                honor_pairs += 1
+        return honor_melds, honor_pairs
+    
+    @staticmethod
+    def _combine_standard_shanten(
+        suit_combinations: List[List[Tuple[int, int, int]]],
+        honor_groups: Tuple[int, int],
+        melds_count: int = 0
+    ) -> int:
+        """
+        由三个数字花色的组合和字牌分组合成标准型向听数
         
-        # 处理字牌
-        for (tile_type, value), count in list(counts.items()):
-            if tile_type in [TileType.FENG, TileType.JIAN]:
-                if count >= 3:
-                    honor_melds += count // 3
-                    count = count % 3
-                if count == 2:
-                    honor_pairs += 1
-                del counts[(tile_type, value)]
-        
-        # 处理数字牌
-        suits_data = {}
-        for suit in [TileType.WAN, TileType.TONG, TileType.TIAO]:
-            suit_counts = [counts.get((suit, i), 0) for i in range(1, 10)]
-            suits_data[suit] = suit_counts
+        拆分出来是为了让进张枚举只重新计算摸牌所在的花色，其余花色的结果直接复用
+        """
+        honor_melds, honor_pairs = honor_groups
+        # 组合最多的花色放在最内层，外两层先把固定部分累加好
+        outer_a, outer_b, inner = sorted(suit_combinations, key=len)
         
         # 最差情况大的向听数
         min_shanten = 8
             
-        # 计算数字牌的最佳组合 (面子数，搭子数，对子数)
-        for wan_result in ShantenCalculator._get_suit_combinations(suits_data[TileType.WAN]):
-            for tong_result in ShantenCalculator._get_suit_combinations(suits_data[TileType.TONG]):
-                for tiao_result in ShantenCalculator._get_suit_combinations(suits_data[TileType.TIAO]):
-                    total_melds = wan_result[0] + tong_result[0] + tiao_result[0] + honor_melds + melds_count
-                    total_tatsu = wan_result[1] + tong_result[1] + tiao_result[1]
-                    total_pairs = + wan_result[2] + tong_result[2] + tiao_result[2] + honor_pairs
-
+        # 计算数字牌的最佳组合 (面子数，搭子数，对子数)，向听数公式见 _calc_shanten_from_groups
+        for a_melds, a_tatsu, a_pairs in outer_a:
+            for b_melds, b_tatsu, b_pairs in outer_b:
+                base_melds = a_melds + b_melds + honor_melds + melds_count
+                base_tatsu = a_tatsu + b_tatsu
+                base_pairs = a_pairs + b_pairs + honor_pairs
+                for melds, tatsu, pairs in inner:
+                    total_melds = base_melds + melds
+                    total_tatsu = base_tatsu + tatsu
+                    total_pairs = base_pairs + pairs
+                    
                     # 如果手牌已经胡牌，则向听数为-1
                     if total_melds == 4 and total_pairs == 1 and total_tatsu == 0:
                         return -1
                     
-                    # 计算向听数
-                    shanten = ShantenCalculator._calc_shanten_from_groups(
-                        total_melds, total_tatsu, total_pairs
-                    )
-                    min_shanten = min(min_shanten, shanten)
+                    blocks = total_tatsu + total_pairs
+                    shanten = 8 - 2 * total_melds - min(blocks, 4 - total_melds)
+                    if total_pairs and total_melds + blocks >= 5:
+                        shanten -= 1
+                    if shanten < min_shanten:
+                        min_shanten = shanten
         
         return max(0, min_shanten)
     
@@ -135,97 +242,92 @@ class ShantenCalculator:
         """
         获取单个花色的所有可能组合
         
-        使用递归回溯算法枚举所有可能的面子、搭子、对子组合
-        返回 (面子数, 搭子数, 对子数) 的所有可能组合
+        返回 (面子数, 搭子数, 对子数) 的所有可能组合（结果会被缓存共享，调用方不可修改）
         """
         if not suit_counts or len(suit_counts) != 9:
             return [(0, 0, 0)]
         
-        # 如果所有牌都是0，返回空组合
-        if all(count == 0 for count in suit_counts):
-            return [(0, 0, 0)]
+        # 打包成整数键：k = c0 | c1<<4 | ... | c8<<32（每格最多4张）
+        key = 0
+        for count in reversed(suit_counts):
+            key = (key << 4) | count
+        return ShantenCalculator._get_suit_combinations_by_key(key)
+    
+    @staticmethod
+    def _get_suit_combinations_by_key(key: int) -> List[Tuple[int, int, int]]:
+        """
+        按打包键求单个花色的组合（记忆化的分解）
         
-        results = []
-        ShantenCalculator._enumerate_combinations(suit_counts[:], 0, 0, 0, results)
+        取最小的非零点数，枚举它参与的刻子、顺子、对子、两面/嵌张搭子或作为孤张，
+        剩余部分本身也是一个花色计数，直接递归查同一张缓存表。
+        各子问题只保留未被支配的组合，加上同一个增量后支配关系不变，结果与整体枚举后再剔除相同。
+        """
+        cache = ShantenCalculator._suit_cache
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # 如果所有牌都是0，返回空组合
+        if key == 0:
+            unique_results = [(0, 0, 0)]
+        else:
+            # 寻找第一个非零位置
+            shift = 0
+            while not (key >> shift) & 0xF:
+                shift += 4
+            count = (key >> shift) & 0xF
+            next1 = (key >> (shift + 4)) & 0xF if shift <= 28 else 0
+            next2 = (key >> (shift + 8)) & 0xF if shift <= 24 else 0
+            
+            results = set()
+            sub = ShantenCalculator._get_suit_combinations_by_key
+            
+            def extend(sub_key: int, melds: int, tatsu: int, pairs: int):
+                for m, t, p in sub(sub_key):
+                    results.add((m + melds, t + tatsu, p + pairs))
+            
+            # 1. 刻子
+            if count >= 3:
+                extend(key - (3 << shift), 1, 0, 0)
+            # 2. 顺子
+            if next1 and next2:
+                extend(key - (0x111 << shift), 1, 0, 0)
+            # 3. 对子
+            if count >= 2:
+                extend(key - (2 << shift), 0, 0, 1)
+            # 4. 两面搭子
+            if next1:
+                extend(key - (0x11 << shift), 0, 1, 0)
+            # 5. 嵌张搭子
+            if next2:
+                extend(key - (0x101 << shift), 0, 1, 0)
+            # 6. 作为孤张跳过
+            extend(key - (1 << shift), 0, 0, 0)
+            
+            unique_results = ShantenCalculator._prune_dominated(results) or [(0, 0, 0)]
         
-        # 去重并返回
-        unique_results = list(set(results))
-        return unique_results if unique_results else [(0, 0, 0)]
+        if len(cache) >= ShantenCalculator._SUIT_CACHE_MAX:
+            cache.clear()
+        cache[key] = unique_results
+        return unique_results
     
     @staticmethod
-    def _enumerate_combinations(
-        counts: List[int], 
-        melds: int, 
-        tatsu: int, 
-        pairs: int, 
-        results: List[Tuple[int, int, int]]
-    ):
+    def _prune_dominated(combinations: Set[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
         """
-        递归枚举所有可能的组合
+        剔除被支配的 (面子数, 搭子数, 对子数) 组合
         
-        Args:
-            counts: 当前各位置的牌数
-            melds: 已形成的面子数
-            tatsu: 已形成的搭子数  
-            pairs: 已形成的对子数
-            results: 结果列表
+        若另一组合满足 面子数>=、搭子数+对子数>=、对子数>=，则其向听数不会更差，
+        当前组合可以丢弃。搭子数为0的组合全部保留，保证胡牌(-1)的判断不受影响。
         """
-        # 寻找第一个非零位置
-        pos = -1
-        for i in range(9):
-            if counts[i] > 0:
-                pos = i
-                break
-        
-        # 如果没有牌了，记录当前组合
-        if pos == -1:
-            results.append((melds, tatsu, pairs))
-            return
-        
-        # 尝试所有可能的处理方式
-        
-        # 1. 尝试形成刻子（如果有3张或以上）
-        if counts[pos] >= 3:
-            counts[pos] -= 3
-            ShantenCalculator._enumerate_combinations(counts, melds + 1, tatsu, pairs, results)
-            counts[pos] += 3
-        
-        # 2. 尝试形成顺子（如果可能）
-        if pos <= 6 and counts[pos] > 0 and counts[pos + 1] > 0 and counts[pos + 2] > 0:
-            counts[pos] -= 1
-            counts[pos + 1] -= 1
-            counts[pos + 2] -= 1
-            ShantenCalculator._enumerate_combinations(counts, melds + 1, tatsu, pairs, results)
-            counts[pos] += 1
-            counts[pos + 1] += 1
-            counts[pos + 2] += 1
-        
-        # 3. 尝试形成对子（如果有2张或以上）
-        if counts[pos] >= 2:
-            counts[pos] -= 2
-            ShantenCalculator._enumerate_combinations(counts, melds, tatsu, pairs + 1, results)
-            counts[pos] += 2
-        
-        # 4. 尝试形成两面搭子（如果可能）
-        if pos <= 7 and counts[pos] > 0 and counts[pos + 1] > 0:
-            counts[pos] -= 1
-            counts[pos + 1] -= 1
-            ShantenCalculator._enumerate_combinations(counts, melds, tatsu + 1, pairs, results)
-            counts[pos] += 1
-            counts[pos + 1] += 1
-        
-        # 5. 尝试形成嵌张搭子（如果可能）
-        if pos <= 6 and counts[pos] > 0 and counts[pos + 2] > 0:
-            counts[pos] -= 1
-            counts[pos + 2] -= 1
-            ShantenCalculator._enumerate_combinations(counts, melds, tatsu + 1, pairs, results)
-            counts[pos] += 1
-            counts[pos + 2] += 1
-        
-        # 6. 跳过当前牌（作为孤张处理）
-        counts[pos] -= 1
-        ShantenCalculator._enumerate_combinations(counts, melds, tatsu, pairs, results)
-        counts[pos] += 1
+        kept = []
+        for m, t, p in combinations:
+            if t > 0 and any(
+                m2 >= m and t2 + p2 >= t + p and p2 >= p and (m2, t2, p2) != (m, t, p)
+                for m2, t2, p2 in combinations
+            ):
+                continue
+            kept.append((m, t, p))
+        return kept
     
     @staticmethod
     def _calc_shanten_from_groups(melds: int, tatsu: int, pairs: int) -> int:
@@ -242,16 +344,10 @@ class ShantenCalculator:
         return shanten
     
     @staticmethod
-    def _calculate_seven_pairs_shanten(tile_counts: Dict[Tuple[TileType, Union[int, FengType, JianType]], int]) -> int:
+    def _calculate_seven_pairs_shanten(tile_counts: List[int]) -> int:
         """计算七对子向听数"""
-        pairs = 0
-        single_tiles = 0
-        
-        for count in tile_counts.values():
-            if count >= 2:
-                pairs += count // 2
-            if count % 2 == 1:
-                single_tiles += 1
+        # 每格计数为0-4，对子数 count // 2 即 2、3张各算1对，4张算2对，用list.count在C层统计
+        pairs = len(tile_counts) - tile_counts.count(0) - tile_counts.count(1) + tile_counts.count(4)
         
         # 如果手牌已经胡牌，则向听数为-1
         if pairs == 7:
@@ -261,7 +357,7 @@ class ShantenCalculator:
         return 6 - pairs
     
     @staticmethod
-    def _calculate_kokushi_shanten(tile_counts: Dict[Tuple[TileType, Union[int, FengType, JianType]], int]) -> int:
+    def _calculate_kokushi_shanten(tile_counts: List[int]) -> int:
         """
         计算国士无双向听数
         
@@ -269,23 +365,12 @@ class ShantenCalculator:
         1. 如果手牌里有全部n种国士无双的牌，且每种都是只有一张，则向听数是13-n
         2. 如果手牌里有n种国士无双的牌，且其中至少有一张的数量>=2，则向听数也是12-n
         """
-        # 定义国士无双的13种牌的keys
-        kokushi_keys = [
-            (TileType.WAN, 1), (TileType.WAN, 9),
-            (TileType.TONG, 1), (TileType.TONG, 9),
-            (TileType.TIAO, 1), (TileType.TIAO, 9),
-            (TileType.FENG, FengType.DONG), (TileType.FENG, FengType.NAN),
-            (TileType.FENG, FengType.XI), (TileType.FENG, FengType.BEI),
-            (TileType.JIAN, JianType.ZHONG), (TileType.JIAN, JianType.FA),
-            (TileType.JIAN, JianType.BAI)
-        ]
-        
         # 统计手牌中有多少种国士无双牌
         kokushi_types_count = 0
         has_pair = False
         
-        for key in kokushi_keys:
-            count = tile_counts.get(key, 0)
+        for index in _KOKUSHI_INDICES:
+            count = tile_counts[index]
             if count > 0:
                 kokushi_types_count += 1
                 if count >= 2:
@@ -304,6 +389,11 @@ class ShantenCalculator:
 class UkeireCalculator:
     """有效进张计算器"""
     
+    # 进张缓存：键为 (手牌34格计数bytes, 已见牌34格计数bytes, 副露数, 缺门, 向听类型)
+    # 同一回合内打牌分析、顶峰理论会对相同的手牌和牌河反复计算进张
+    _ukeire_cache: Dict[Tuple[bytes, bytes, int, Optional[str], str], Dict] = {}
+    _UKEIRE_CACHE_MAX = 50_000
+    
     @staticmethod
     def calculate_ukeire(
         tiles: List[Tile], # 13张
@@ -322,82 +412,125 @@ class UkeireCalculator:
             discard_pool: 已出的牌 （牌河）
             
         Returns:
-            {牌的key: 有效张数}
+            {牌的key: 有效张数}（结果会被缓存共享，调用方不可修改）
         """
         if discard_pool is None:
             discard_pool = []
         
-        current_shanten = ShantenCalculator.calculate_shanten(tiles, melds_count, shentan_type=shentan_type)
+        tile_counts = ShantenCalculator._count_tiles34(tiles)
         
-        # 统计已经出现的牌
-        used_tiles = Counter()
-        for tile in tiles + discard_pool:
-            if tile.tile_type == TileType.FENG:
-                key = (tile.tile_type, tile.feng_type)
-            elif tile.tile_type == TileType.JIAN:
-                key = (tile.tile_type, tile.jian_type)
-            else:
-                key = (tile.tile_type, tile.value)
-            used_tiles[key] += 1
+        # 统计已经出现的牌（手牌+牌河）
+        used_counts = tile_counts.copy()
+        for tile in discard_pool:
+            used_counts[tile.idx34] += 1
+        
+        return UkeireCalculator._calculate_ukeire_from_counts(
+            tile_counts, used_counts, melds_count, missing_suit, shentan_type
+        )
+    
+    @staticmethod
+    def _calculate_ukeire_from_counts(
+        tile_counts: List[int],
+        used_counts: List[int],
+        melds_count: int = 0,
+        missing_suit: Optional[str] = None,
+        shentan_type: Literal["general", "pairs", "kokushi"] = "general"
+    ) -> Dict[Tuple[TileType, Union[int, FengType, JianType]], int]:
+        """
+        基于34格计数数组计算有效进张
+        
+        摸牌通过原地加减tile_counts模拟，不再为每种进张复制手牌、创建牌对象。
+        返回前tile_counts会恢复原状。结果会被缓存共享，调用方不可修改。
+        """
+        cache = UkeireCalculator._ukeire_cache
+        cache_key = (bytes(tile_counts), bytes(used_counts), melds_count, missing_suit, shentan_type)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        current_shanten = ShantenCalculator._calculate_shanten_from_counts(
+            tile_counts, melds_count, shentan_type
+        )
+        
+        # 一般型：摸一张牌只改变一个花色，先算好各花色和字牌的结果，摸牌时只重算变化的部分
+        skip_isolated = False
+        if shentan_type == "general":
+            # 各花色的打包键，摸到点数r的牌等价于键加上 1 << 4r
+            suit_keys = []
+            for base in (0, 9, 18):
+                key = 0
+                for count in reversed(tile_counts[base:base + 9]):
+                    key = (key << 4) | count
+                suit_keys.append(key)
+            suit_combinations = [
+                ShantenCalculator._get_suit_combinations_by_key(key) for key in suit_keys
+            ]
+            honor_groups = ShantenCalculator._get_honor_groups(tile_counts)
+            # 空手牌的向听数是特殊值13，不能按孤张跳过
+            skip_isolated = any(tile_counts)
         
         # 计算各种牌的进张效果
         ukeire = {}
+        missing_suit_id = SUIT_ID_BY_NAME.get(missing_suit) if missing_suit else None
         
-        # 遍历所有可能的牌
-        for tile_type in [TileType.WAN, TileType.TONG, TileType.TIAO, TileType.FENG, TileType.JIAN]:
-            if tile_type == TileType.FENG:
-                values = [FengType.DONG, FengType.NAN, FengType.XI, FengType.BEI]  # 风牌
-            elif tile_type == TileType.JIAN:
-                values = [JianType.ZHONG, JianType.FA, JianType.BAI]  # 箭牌
+        # 按34索引顺序遍历所有可能的牌（万、筒、条、风、箭）
+        for idx, key in enumerate(_TILE_KEYS):
+            # 检查是否是缺门牌
+            if idx // 9 == missing_suit_id:
+                continue
+            
+            remaining_count = 4 - used_counts[idx] # 每种花色4张，所以剩余张数就是4减去已出现过的张数
+            if remaining_count <= 0:
+                continue
+            
+            # 一般型下，同花色前后两格内都没有牌的数字牌、手里没有的字牌，摸进来只能作为孤张，向听数不变
+            if skip_isolated and (
+                not suit_keys[idx // 9] & _SUIT_NEIGHBOUR_NIBBLES[idx % 9] if idx < 27 else not tile_counts[idx]
+            ):
+                continue
+            
+            # 模拟摸到这张牌后的向听数
+            tile_counts[idx] += 1
+            if shentan_type != "general":
+                new_shanten = ShantenCalculator._calculate_shanten_from_counts(
+                    tile_counts, melds_count, shentan_type
+                )
+            elif idx < 27:
+                suit_id = idx // 9
+                drawn_combinations = suit_combinations.copy()
+                drawn_combinations[suit_id] = ShantenCalculator._get_suit_combinations_by_key(
+                    suit_keys[suit_id] + (1 << ((idx - suit_id * 9) << 2))
+                )
+                new_shanten = ShantenCalculator._combine_standard_shanten(
+                    drawn_combinations, honor_groups, melds_count
+                )
             else:
-                values = range(1, 10) # 0-9
+                new_shanten = ShantenCalculator._combine_standard_shanten(
+                    suit_combinations, ShantenCalculator._get_honor_groups(tile_counts), melds_count
+                )
+            tile_counts[idx] -= 1
             
-            for value in values:
-                key = (tile_type, value)
-                # if tile_type == TileType.WAN and value == 9:
-                #     print()
-                
-                # 检查是否是缺门牌
-                if missing_suit and UkeireCalculator._is_missing_suit_tile(tile_type, missing_suit):
-                    continue
-                
-                remaining_count = 4 - used_tiles.get(key, 0) # 每种花色4张，所以剩余张数就是4减去已出现过的张数
-                if remaining_count <= 0:
-                    continue
-                
-                # 模拟摸到这张牌后的向听数
-                test_tiles = tiles + [UkeireCalculator._create_tile_from_key(key)]
-                new_shanten = ShantenCalculator.calculate_shanten(test_tiles, melds_count, shentan_type=shentan_type)
-                
-                # 如果向听数减少，这是有效进张
-                if new_shanten < current_shanten:
-                    ukeire[key] = remaining_count
+            # 如果向听数减少，这是有效进张
+            if new_shanten < current_shanten:
+                ukeire[key] = remaining_count
         
+        if len(cache) >= UkeireCalculator._UKEIRE_CACHE_MAX:
+            cache.clear()
+        cache[cache_key] = ukeire
         return ukeire
     
-    @staticmethod
-    def _is_missing_suit_tile(tile_type: TileType, missing_suit: str) -> bool:
-        """判断是否是缺门牌"""
-        missing_suit_map = {
-            "万": TileType.WAN,
-            "筒": TileType.TONG,
-            "条": TileType.TIAO
-        }
-        return tile_type == missing_suit_map.get(missing_suit)
-    
     @staticmethod
     def _create_tile_from_key(key: Tuple[TileType, Union[int, FengType, JianType]]) -> Tile:
-        """从key创建牌对象"""
-        tile_type, value = key
-        if tile_type in [TileType.WAN, TileType.TONG, TileType.TIAO]:
-            return Tile(tile_type, value)
-        elif tile_type == TileType.FENG:
-            return Tile(tile_type, feng_type=value)
-        else:
-            return Tile(tile_type, jian_type=value)
+        """从key获取牌对象（复用预先创建的34种牌）"""
+        return _TILE_BY_KEY[key]
 
 class TileEfficiencyAnalyzer:
     """牌效率分析器"""
+    
+    # 最优听牌状态缓存：键为 (14张手牌的idx34序列, 副露数, 缺门, 向听类型, 牌河34格计数的bytes)
+    # 值为 (打出牌的idx34, 最终进张)。效率并列时取先出现的牌，所以键保留手牌顺序
+    _waiting_state_cache: Dict[Tuple, Tuple[int, Dict]] = {}
+    _WAITING_STATE_CACHE_MAX = 50_000
 
     @staticmethod
     def analyze_discard_efficiency(
@@ -417,40 +550,58 @@ class TileEfficiencyAnalyzer:
             discard_pool = []
 
         efficiency_scores = {}
-        current_shanten = ShantenCalculator.calculate_shanten(
-            player.hand_tiles, len(player.melds), shentan_type=shentan_type
+
+        # 手牌计数与已见牌计数只统计一次，每个候选打牌原地加减
+        melds_count = len(player.melds)
+        missing_suit = getattr(player, 'missing_suit', None)
+        hand_counts = ShantenCalculator._player_counts34(player)
+        used_counts = hand_counts.copy()
+        for pool_tile in discard_pool:
+            used_counts[pool_tile.idx34] += 1
+
+        current_shanten = ShantenCalculator._calculate_shanten_from_counts(
+            hand_counts, melds_count, shentan_type
         )
+        
+        # 相同的牌打出后结果相同，按34索引缓存 (效率分数, 进张)
+        discard_results = {}
 
         for tile in available_tiles:
-            # 计算打出这张牌后的牌效率 - 只移除一张指定的牌
-            remaining_tiles = player.hand_tiles.copy()
-            remaining_tiles.remove(tile)  # remove()方法只移除第一个匹配的元素
-
-            # 计算向听数变化
-            after_shanten = ShantenCalculator.calculate_shanten(
-                remaining_tiles, len(player.melds), shentan_type=shentan_type
-            )
+            idx = tile.idx34
+            if idx not in discard_results:
+                if hand_counts[idx] == 0:
+                    raise ValueError(f"{tile} 不在手牌中")
+                
+                # 打出这张牌 - 只移除一张
+                hand_counts[idx] -= 1
+                used_counts[idx] -= 1
 
-            # 计算有效进张数量
-            ukeire = UkeireCalculator.calculate_ukeire(
-                remaining_tiles, len(player.melds), 
-                getattr(player, 'missing_suit', None), 
-                discard_pool, 
-                shentan_type=shentan_type
-            )
-            total_ukeire = sum(ukeire.values())
+                # 计算向听数变化
+                after_shanten = ShantenCalculator._calculate_shanten_from_counts(
+                    hand_counts, melds_count, shentan_type
+                )
 
-            # 计算效率分数
-            efficiency = TileEfficiencyAnalyzer._calculate_efficiency_score(
-                tile, current_shanten, after_shanten, total_ukeire, player
-            )
+                # 计算有效进张数量
+                ukeire = UkeireCalculator._calculate_ukeire_from_counts(
+                    hand_counts, used_counts, melds_count, missing_suit, shentan_type
+                )
+                
+                hand_counts[idx] += 1
+                used_counts[idx] += 1
 
+                # 计算效率分数（只取决于牌的种类，相同的牌也只算一次）
+                efficiency = TileEfficiencyAnalyzer._calculate_efficiency_score(
+                    tile, current_shanten, after_shanten, sum(ukeire.values()), player
+                )
+                discard_results[idx] = (efficiency, ukeire)
+            
+            efficiency, ukeire = discard_results[idx]
             efficiency_scores[tile] = (efficiency, ukeire)
 
         # 应用一向听顶峰理论优化top3选择
         if current_shanten <= 2 and use_peak_theory:  # 在二向听和一向听时应用顶峰理论
             efficiency_scores = TileEfficiencyAnalyzer._apply_peak_theory(
-                ukeire, efficiency_scores, player, discard_pool, shentan_type,
+                ukeire, efficiency_scores, player, discard_pool, shentan_type, current_shanten
             )
 
         return efficiency_scores
@@ -477,14 +628,8 @@ class TileEfficiencyAnalyzer:
 
         # 缺门牌必须打出（四川麻将规则）
         missing_suit = getattr(player, 'missing_suit', None)
-        if missing_suit:
-            missing_suit_map = {
-                "万": TileType.WAN,
-                "筒": TileType.TONG,
-                "条": TileType.TIAO
-            }
-            if tile.tile_type == missing_suit_map.get(missing_suit):
-                score += 100.0
+        if missing_suit and tile.idx34 // 9 == SUIT_ID_BY_NAME.get(missing_suit):
+            score += 100.0
 
         # 危险牌调整 - 支持高级和简化两种模式
         if hasattr(player, 'game_context') and player.game_context:
@@ -510,7 +655,8 @@ class TileEfficiencyAnalyzer:
         efficiency_scores: Dict[Tile, float], 
         player: Player, 
         discard_pool: List[Tile],
-        shentan_type: Literal["general", "pairs", "kokushi"] = "general"
+        shentan_type: Literal["general", "pairs", "kokushi"] = "general",
+        current_shanten: Optional[int] = None
     ) -> Dict[Tile, float]:
         """
         应用一向听顶峰理论优化top3选择
@@ -524,18 +670,18 @@ class TileEfficiencyAnalyzer:
         if not efficiency_scores:
             return efficiency_scores
 
-        # 获取当前向听数
-        current_shanten = ShantenCalculator.calculate_shanten(
-            player.hand_tiles, len(player.melds), shentan_type=shentan_type
-        )
+        # 获取当前向听数（调用方已算过时直接复用）
+        if current_shanten is None:
+            current_shanten = ShantenCalculator.calculate_shanten(
+                player.hand_tiles, len(player.melds), shentan_type=shentan_type
+            )
 
         # 只在二向听和一向听时应用顶峰理论
         if current_shanten > 2:
             return efficiency_scores
 
         # 找出top3候选牌
-        sorted_tiles = sorted(efficiency_scores.items(), key=lambda x: x[1][0], reverse=True)
-        top3_tiles = sorted_tiles[:3]
+        top3_tiles = heapq.nlargest(3, efficiency_scores.items(), key=lambda x: x[1][0])
 
         if len(top3_tiles) <= 1:
             return efficiency_scores
@@ -579,16 +725,17 @@ class TileEfficiencyAnalyzer:
         2. 枚举所有可能的进张
         3. 计算每种进张后能形成的听牌类型和进张数
         4. 综合评估进张后的听牌质量
+        
+        调用方（_apply_peak_theory）已经只在二向听以内调用，并传入算好的current_shanten
         """
-        if current_shanten > 2:
-            return 0.0
+        melds_count = len(player.melds)
 
         # 模拟打出这张牌后的手牌
         remaining_tiles = player.hand_tiles.copy()
         remaining_tiles.remove(discard_tile)
 
         after_shanten = ShantenCalculator.calculate_shanten(
-            remaining_tiles, len(player.melds), shentan_type=shentan_type
+            remaining_tiles, melds_count, shentan_type=shentan_type
         )
 
         # 如果打出后向听数变差，不给加分
@@ -598,7 +745,7 @@ class TileEfficiencyAnalyzer:
         # 计算所有可能的进张
         if ukeire is None:
             ukeire = UkeireCalculator.calculate_ukeire(
-                remaining_tiles, len(player.melds), 
+                remaining_tiles, melds_count, 
                 getattr(player, 'missing_suit', None), 
                 discard_pool, 
                 shentan_type=shentan_type
@@ -618,22 +765,8 @@ class TileEfficiencyAnalyzer:
         # 一向听类型奖励
         one_shanten_types = waiting_patterns.get('one_shanten_types', {})
         if one_shanten_types:
-            for tile_key, one_shanten_pattern in one_shanten_types.items():
-                match one_shanten_pattern:
-                    case "余剩牌形":
-                        peak_bonus += 10.0
-                    case "完全一向听":
-                        peak_bonus += 20.0
-                    case "无雀头一向听":
-                        peak_bonus += 30.0
-                    case "双靠张一向听":
-                        peak_bonus += 40.0
-                    case "七对子一向听":
-                        peak_bonus += 10.0
-                    case "七对子与面子手复合一向听":
-                        peak_bonus += 20.0
-                    case "国士一向听":
-                        peak_bonus += 10.0
+            for one_shanten_pattern in one_shanten_types.values():
+                peak_bonus += _ONE_SHANTEN_BONUS.get(one_shanten_pattern, 0.0)
 
         # 听牌类型奖励
         else:
@@ -684,19 +817,24 @@ class TileEfficiencyAnalyzer:
         total_final_ukeire = 0
         one_shanten_types = dict()
         tenpai_types = set()
+        melds_count = len(player.melds)
+        # 摸牌通过原地加减计数模拟，只有需要继续分析时才拼出14张的手牌列表
+        remaining_counts = ShantenCalculator._count_tiles34(remaining_tiles)
 
         # 枚举每种可能的进张
         for tile_key, count in ukeire.items():
             # 模拟摸到这张牌
             test_tile = UkeireCalculator._create_tile_from_key(tile_key)
-            test_tiles = remaining_tiles + [test_tile]
+            remaining_counts[test_tile.idx34] += 1
 
             # 检查是否听牌
-            test_shanten = ShantenCalculator.calculate_shanten(
-                test_tiles, len(player.melds), shentan_type=shentan_type
+            test_shanten = ShantenCalculator._calculate_shanten_from_counts(
+                remaining_counts, melds_count, shentan_type
             )
+            remaining_counts[test_tile.idx34] -= 1
 
             if test_shanten <= 1:  # 接近听牌或已听牌
+                test_tiles = remaining_tiles + [test_tile]
                 # test_tiles现在是14张（摸进后），需要找出最优打牌变成13张听牌
                 final_waiting_state = TileEfficiencyAnalyzer._find_optimal_waiting_state(
                     test_tiles, player, shentan_type, discard_pool
@@ -748,39 +886,92 @@ class TileEfficiencyAnalyzer:
         找出14张手牌的最优听牌状态
         
         逻辑：
-        1. 对手牌进行打牌效率分析（不使用顶峰理论）
-        2. 选择效率最高的打牌
+        1. 对每种可打的牌只计算打后向听数（不做完整的打牌效率分析）
+        2. 按 缺门牌 > 打后向听数小 的顺序选出最优的一组候选
+        3. 只对这一组候选计算进张，取进张总数最多的；仍并列时取手牌中靠前的
         
         Returns:
-            (打出后的手牌, 最终进张字典)
+            (打出后的手牌, 最终进张字典)（进张字典会被缓存共享，调用方不可修改）
         """
         # if len(tiles) != 14:
         #     return None
 
-        # 创建临时玩家对象来进行分析, 因为我们模拟的是多模一张牌后(不是玩家真正的手牌现状)
-        temp_player = Player(f"temp_{player.name}")
-        temp_player.hand_tiles = tiles
-
-        # 继承缺门设置
-        if hasattr(player, 'missing_suit'):
-            temp_player.missing_suit = player.missing_suit
-            temp_player.melds = deepcopy(player.melds)
-
-        efficiency_scores = TileEfficiencyAnalyzer.analyze_discard_efficiency(
-            temp_player, tiles, discard_pool=discard_pool, shentan_type=shentan_type, use_peak_theory=False
-        )
-
-        # 后者效率分数最高的牌
-        sorted_tiles = sorted(efficiency_scores.items(), key=lambda x: x[1][0], reverse=True)
-        discard_tile = sorted_tiles[0][0]
-        final_ukeire = sorted_tiles[0][1][1]
+        # 相同的手牌、副露数、缺门和牌河分析结果相同，直接复用
+        melds_count = len(player.melds)
+        missing_suit = getattr(player, 'missing_suit', None)
+        pool_counts = ShantenCalculator._count_tiles34(discard_pool)
+        order = tuple(tile.idx34 for tile in tiles)
+        cache_key = (order, melds_count, missing_suit, shentan_type, bytes(pool_counts))
+        cache = TileEfficiencyAnalyzer._waiting_state_cache
+        cached = cache.get(cache_key)
+        if cached is None:
+            tile_counts = ShantenCalculator._count_tiles34(tiles)
+            used_counts = [count + pool_counts[idx] for idx, count in enumerate(tile_counts)]
+            cached = TileEfficiencyAnalyzer._probe_tenpai_discard(
+                tile_counts, used_counts, order, melds_count, missing_suit, shentan_type
+            )
+            if len(cache) >= TileEfficiencyAnalyzer._WAITING_STATE_CACHE_MAX:
+                cache.clear()
+            cache[cache_key] = cached
 
-        tiles.remove(discard_tile)
+        discard_idx, final_ukeire = cached
+        tiles.remove(ALL_TILES[discard_idx])
 
         best_final_state = (tiles, final_ukeire)
 
         return best_final_state
 
+    @staticmethod
+    def _probe_tenpai_discard(
+        tile_counts: List[int],
+        used_counts: List[int],
+        order: Sequence[int],
+        melds_count: int,
+        missing_suit: Optional[str],
+        shentan_type: Literal["general", "pairs", "kokushi"] = "general"
+    ) -> Tuple[int, Dict[Tuple[TileType, Union[int, FengType, JianType]], int]]:
+        """
+        在计数数组上找出最优打牌，返回 (打出牌的idx34, 打出后的进张)
+        
+        tile_counts/used_counts 原地加减模拟打牌，返回前恢复原状
+        """
+        missing_suit_id = SUIT_ID_BY_NAME.get(missing_suit) if missing_suit else None
+        
+        # (非缺门牌, 打后向听数, idx34)，按手牌顺序每种牌只算一次
+        candidates = []
+        seen = set()
+        for idx in order:
+            if idx in seen:
+                continue
+            seen.add(idx)
+            tile_counts[idx] -= 1
+            after_shanten = ShantenCalculator._calculate_shanten_from_counts(
+                tile_counts, melds_count, shentan_type
+            )
+            tile_counts[idx] += 1
+            candidates.append((idx // 9 != missing_suit_id, after_shanten, idx))
+        
+        best_rank = min(candidate[:2] for candidate in candidates)
+        best_idx = -1
+        best_ukeire = {}
+        best_total = -1
+        for not_missing, after_shanten, idx in candidates:
+            if (not_missing, after_shanten) != best_rank:
+                continue
+            tile_counts[idx] -= 1
+            used_counts[idx] -= 1
+            ukeire = UkeireCalculator._calculate_ukeire_from_counts(
+                tile_counts, used_counts, melds_count, missing_suit, shentan_type
+            )
+            tile_counts[idx] += 1
+            used_counts[idx] += 1
+            
+            total = sum(ukeire.values())
+            if total > best_total:
+                best_idx, best_ukeire, best_total = idx, ukeire, total
+        
+        return best_idx, best_ukeire
+
     # 判断一向听类型
     @staticmethod
     def _classify_1shanten_pattern(
@@ -818,19 +1009,21 @@ class TileEfficiencyAnalyzer:
         """
         waiting_count = len(final_ukeire)
         total_waiting_tiles = sum(final_ukeire.values())
+        # 各个判断共用同一份手牌计数（34索引计数数组）
+        tile_counts = ShantenCalculator._count_tiles34(tiles)
 
         # 检查特殊牌型
-        special_pattern = TileEfficiencyAnalyzer._check_special_tenpai_patterns(tiles, final_ukeire)
+        special_pattern = TileEfficiencyAnalyzer._check_special_tenpai_patterns(tiles, final_ukeire, tile_counts)
         if special_pattern:
             return special_pattern
 
         # 根据进张数量分类
         if waiting_count == 1:
             # 单听（1张）
-            return TileEfficiencyAnalyzer._classify_single_wait(tiles, final_ukeire)
+            return TileEfficiencyAnalyzer._classify_single_wait(tiles, final_ukeire, tile_counts)
         elif waiting_count == 2:
             # 双听（2张）
-            return TileEfficiencyAnalyzer._classify_double_wait(tiles, final_ukeire)
+            return TileEfficiencyAnalyzer._classify_double_wait(tiles, final_ukeire, tile_counts)
         elif waiting_count == 3:
             # 三面听
             return 'sanmen'
@@ -844,18 +1037,17 @@ class TileEfficiencyAnalyzer:
     @staticmethod
     def _check_special_tenpai_patterns(
         tiles: List[Tile], 
-        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int]
+        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int],
+        tile_counts: Optional[List[int]] = None
     ) -> Optional[str]:
         """检查特殊听牌形态：九莲宝灯、十三幺等"""
-        tile_counts = ShantenCalculator._count_tiles(tiles)
-
         # 检查十三幺听牌
         # TODO: 跟向听国士无双（十三幺）的代码有重复
-        if TileEfficiencyAnalyzer._is_kokushi_tenpai(tiles, final_ukeire):
+        if TileEfficiencyAnalyzer._is_kokushi_tenpai(tiles, final_ukeire, tile_counts):
             return 'kokushi'
 
         # 检查九莲宝灯听牌
-        if TileEfficiencyAnalyzer._is_jiulian_tenpai(tiles, final_ukeire):
+        if TileEfficiencyAnalyzer._is_jiulian_tenpai(tiles, final_ukeire, tile_counts):
             return 'jiulian'
 
         return None
@@ -863,69 +1055,57 @@ class TileEfficiencyAnalyzer:
     @staticmethod
     def _is_kokushi_tenpai(
         tiles: List[Tile], 
-        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int]
+        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int],
+        tile_counts: Optional[List[int]] = None
     ) -> bool:
         """判断是否为十三幺听牌"""
-        # 十三幺的13种特定牌
-        kokushi_keys = {
-            (TileType.WAN, 1), (TileType.WAN, 9),
-            (TileType.TONG, 1), (TileType.TONG, 9),
-            (TileType.TIAO, 1), (TileType.TIAO, 9),
-            (TileType.FENG, FengType.DONG), (TileType.FENG, FengType.NAN),
-            (TileType.FENG, FengType.XI), (TileType.FENG, FengType.BEI),
-            (TileType.JIAN, JianType.ZHONG), (TileType.JIAN, JianType.FA),
-            (TileType.JIAN, JianType.BAI)
-        }
+        if tile_counts is None:
+            tile_counts = ShantenCalculator._count_tiles34(tiles)
 
-        tile_counts = ShantenCalculator._count_tiles(tiles)
+        # 十三幺的13种特定牌的张数
+        kokushi_counts = [tile_counts[idx] for idx in _KOKUSHI_INDICES]
 
         # 检查是否只包含十三幺牌型
-        for tile_key in tile_counts.keys():
-            if tile_key not in kokushi_keys:
-                return False
-
-        # 检查是否有12种不同的牌，其中一种是对子
-        unique_types = len(tile_counts)
-        pair_count = sum(1 for count in tile_counts.values() if count == 2)
+        if sum(kokushi_counts) != sum(tile_counts):
+            return False
 
-        return unique_types == 13 and pair_count == 0
+        # 13种牌各有一张，没有对子
+        return 0 not in kokushi_counts and 2 not in kokushi_counts
 
     @staticmethod
     def _is_jiulian_tenpai(
         tiles: List[Tile], 
-        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int]
+        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int],
+        tile_counts: Optional[List[int]] = None
     ) -> bool:
         """判断是否为九莲宝灯听牌"""
-        # 九莲宝灯必须是清一色
-        tile_types = set(tile.tile_type for tile in tiles if tile.is_number_tile())
-        if len(tile_types) != 1:
+        # 九莲听牌至少听8种牌，先做这个最便宜的判断
+        if len(final_ukeire) < 8:
             return False
 
-        suit = list(tile_types)[0]
-        tile_counts = ShantenCalculator._count_tiles(tiles)
+        if tile_counts is None:
+            tile_counts = ShantenCalculator._count_tiles34(tiles)
 
-        # 构建该花色的牌数分布
-        suit_distribution = [0] * 9
-        for (tile_type, value), count in tile_counts.items():
-            if tile_type == suit and 1 <= value <= 9:
-                suit_distribution[value - 1] = count
+        # 九莲宝灯必须是清一色：数字牌只出现在一个花色里
+        suit_bases = [base for base in (0, 9, 18) if any(tile_counts[base:base + 9])]
+        if len(suit_bases) != 1:
+            return False
 
-        # 九莲宝灯的基本形态：1112345678999
-        expected = [3, 1, 1, 1, 1, 1, 1, 1, 3]
+        # 该花色的牌数分布，即计数数组中连续的9格
+        base = suit_bases[0]
+        suit_distribution = tile_counts[base:base + 9]
 
-        # 检查是否符合九莲基本形态（允许一张牌的差异）
-        differences = 0
-        for i in range(9):
-            if suit_distribution[i] != expected[i]:
-                differences += abs(suit_distribution[i] - expected[i])
+        # 检查是否符合九莲基本形态1112345678999（允许一张牌的差异）
+        differences = sum(abs(count - expected) for count, expected in zip(suit_distribution, _JIULIAN_EXPECTED))
 
         # 如果只有一张牌的差异，可能是九莲听牌
-        return differences <= 2 and len(final_ukeire) >= 8
+        return differences <= 2
 
     @staticmethod
     def _classify_single_wait(
         tiles: List[Tile], 
-        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int]
+        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int],
+        tile_counts: Optional[List[int]] = None
     ) -> str:
         """分类单听形态"""
         waiting_tile_key = list(final_ukeire.keys())[0]
@@ -936,7 +1116,8 @@ class TileEfficiencyAnalyzer:
             return 'tanki'
 
         # 分析数字牌的听牌类型
-        tile_counts = ShantenCalculator._count_tiles(tiles)
+        if tile_counts is None:
+            tile_counts = ShantenCalculator._count_tiles34(tiles)
 
         # 检查是否为边张听 1, 2 -> 3; 8, 9 -> 7
         if value in [3, 7]:
@@ -945,8 +1126,9 @@ class TileEfficiencyAnalyzer:
         # 检查是否为嵌张听
         if 2 <= value <= 8:
             # 检查是否有两边的搭子
-            left_exists = tile_counts.get((tile_type, value - 1), 0) > 0
-            right_exists = tile_counts.get((tile_type, value + 1), 0) > 0
+            idx = _INDEX_BY_KEY[waiting_tile_key]
+            left_exists = tile_counts[idx - 1] > 0
+            right_exists = tile_counts[idx + 1] > 0
             if left_exists and right_exists:
                 return 'kanchan'
 
@@ -956,7 +1138,8 @@ class TileEfficiencyAnalyzer:
     @staticmethod
     def _classify_double_wait(
         tiles: List[Tile], 
-        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int]
+        final_ukeire: Dict[Tuple[TileType, Union[int, FengType, JianType]], int],
+        tile_counts: Optional[List[int]] = None
     ) -> str:
         """分类双听形态"""
         waiting_keys = list(final_ukeire.keys())
@@ -965,32 +1148,28 @@ class TileEfficiencyAnalyzer:
         if any(key[0] in [TileType.FENG, TileType.JIAN] for key in waiting_keys):
             return 'shanpon'
 
-        tile_counts = ShantenCalculator._count_tiles(tiles)
+        if tile_counts is None:
+            tile_counts = ShantenCalculator._count_tiles34(tiles)
 
         # 如果都是同一花色的数字牌
         if len(set(key[0] for key in waiting_keys)) == 1 and waiting_keys[0][0] in [TileType.WAN, TileType.TONG, TileType.TIAO]:
             tile_type = waiting_keys[0][0]
             values = [key[1] for key in waiting_keys]
             values.sort()
+            base = _INDEX_BY_KEY[(tile_type, 1)] - 1
 
             # 检查是否为两面听（相邻的两张牌）
             if len(values) == 2:
                 if values[1] - values[0] == 3:
                     # 如听36，可能是两面听 (45->36)，也可能是双钓将(3456->3,6)
                     # 下列算法并未十分准确，但可以大致判断（未验证）
-                    if (
-                        tile_counts.get((tile_type, values[0]), 0) >= 1
-                        and tile_counts.get((tile_type, values[1]), 0) >= 1
-                    ):
+                    if tile_counts[base + values[0]] >= 1 and tile_counts[base + values[1]] >= 1:
                         return 'shuangtiao'
                     else:
                         return 'ryanmen'
                 else:
                     # 检查是否为双碰听（两对等任一对成刻）（未验证）
-                    if (
-                        tile_counts.get((tile_type, values[0]), 0) >= 2
-                        and tile_counts.get((tile_type, values[1]), 0) >= 2
-                    ):
+                    if tile_counts[base + values[0]] >= 2 and tile_counts[base + values[1]] >= 2:
                         return 'shanpon'
 
         # 默认分类
@@ -1001,23 +1180,14 @@ class TileEfficiencyAnalyzer:
         """
         判断手牌是否有单张
         """
-        tile_counts = ShantenCalculator._count_tiles(tiles)
-        for tile_type, value in tile_counts.items():
-            if value == 1:
-                return True
-        return False
+        return 1 in ShantenCalculator._count_tiles34(tiles)
 
     @staticmethod
     def _has_2_pairs(tiles: List[Tile]) -> bool:
         """
         判断手牌是否有2对
         """
-        tile_counts = ShantenCalculator._count_tiles(tiles)
-        pair_count = 0
-        for tile_type, value in tile_counts.items():
-            if value == 2:
-                pair_count += 1
-        return pair_count == 2
+        return ShantenCalculator._count_tiles34(tiles).count(2) == 2
 
     @staticmethod
     def _is_dangerous_tile(tile: Tile) -> bool:
@@ -1030,26 +1200,7 @@ class TileEfficiencyAnalyzer:
         3. 边张（19）相对安全
         4. 字牌中，三元牌比四风牌更危险
         """
-        # 数字牌的危险度判断
-        if tile.is_number_tile():
-            # 中张牌（3-7）比较危险，456最危险
-            if 4 <= tile.value <= 6:
-                return True  # 最危险的中张牌
-            elif 3 <= tile.value <= 7:
-                return True  # 次危险的中张牌
-            else:
-                return False  # 边张（1,2,8,9）相对安全
-
-        # 字牌的危险度判断
-        elif tile.is_honor_tile():
-            # 箭牌（三元牌）比风牌更危险
-            if tile.tile_type == TileType.JIAN:
-                return True  # 中发白相对危险
-            else:
-                # 风牌相对安全，但仍有一定危险
-                return False
-
-        return False
+        return _DANGEROUS_BY_INDEX[tile.idx34]
 
     @staticmethod
     def evaluate_tile_danger_level(
@@ -1070,99 +1221,93 @@ class TileEfficiencyAnalyzer:
         Returns:
             危险度评分 (0.0-1.0, 越高越危险)
         """
+        if not discard_pool and not all_visible_tiles:
+            return _COLD_DANGER_BY_INDEX[tile.idx34]
+        danger_index = TileEfficiencyAnalyzer._build_danger_index(discard_pool, all_visible_tiles)
+        return TileEfficiencyAnalyzer._evaluate_danger_from_index(tile, danger_index, round_number)
+
+    @staticmethod
+    def evaluate_tile_danger_level_batch(
+        tiles: List[Tile],
+        discard_pool: List[Tuple[Tile, str]] = None,
+        all_visible_tiles: List[Tile] = None,
+        round_number: int = 1
+    ) -> List[float]:
+        """
+        批量评估多张牌的危险度，出牌池和可见牌只整理一次
+        
+        Returns:
+            与tiles一一对应的危险度评分列表，规则同 evaluate_tile_danger_level
+        """
+        if not discard_pool and not all_visible_tiles:
+            return [_COLD_DANGER_BY_INDEX[tile.idx34] for tile in tiles]
+        danger_index = TileEfficiencyAnalyzer._build_danger_index(discard_pool, all_visible_tiles)
+        evaluate = TileEfficiencyAnalyzer._evaluate_danger_from_index
+        return [evaluate(tile, danger_index, round_number) for tile in tiles]
+
+    @staticmethod
+    def _build_danger_index(
+        discard_pool: List[Tuple[Tile, str]] = None,
+        all_visible_tiles: List[Tile] = None
+    ) -> Tuple[Set[int], Set[int], Set[int], List[int]]:
+        """
+        把出牌池和可见牌整理成按34索引查询的结构，同一回合评估多张牌时只需整理一次
+
+        Returns:
+            (出过的牌, 最近10张舍牌, 前5张舍牌同花色±2以内的数牌, 可见牌34格计数)
+        """
         if discard_pool is None:
             discard_pool = []
         if all_visible_tiles is None:
             all_visible_tiles = []
 
-        danger_score = 0.0
+        discard_indices = {discarded_tile.idx34 for discarded_tile, _ in discard_pool}
+        recent_indices = {discarded_tile.idx34 for discarded_tile, _ in discard_pool[-10:]}
+
+        early_near_indices = set()
+        for early_tile, _ in discard_pool[:5]:
+            early_idx = early_tile.idx34
+            if early_idx < 27:
+                suit_base = early_idx - early_idx % 9
+                for near_idx in range(max(suit_base, early_idx - 2), min(suit_base + 8, early_idx + 2) + 1):
+                    early_near_indices.add(near_idx)
+
+        visible_counts = ShantenCalculator._count_tiles34(all_visible_tiles)
+        return discard_indices, recent_indices, early_near_indices, visible_counts
+
+    @staticmethod
+    def _evaluate_danger_from_index(
+        tile: Tile,
+        danger_index: Tuple[Set[int], Set[int], Set[int], List[int]],
+        round_number: int = 1
+    ) -> float:
+        """基于 _build_danger_index 的结果评估危险度，规则同 evaluate_tile_danger_level"""
+        discard_indices, recent_indices, early_near_indices, visible_counts = danger_index
+        idx = tile.idx34
 
         # 1. 现物/生张理论 - 现物安全 生张危险
-        for discarded_tile, _ in discard_pool:
-            if (tile.tile_type == discarded_tile.tile_type and 
-                tile.value == discarded_tile.value and
-                tile.feng_type == discarded_tile.feng_type and
-                tile.jian_type == discarded_tile.jian_type):
-                appears_in_discard = True
-                return 0.0  # 现物绝对安全
-
-        # 2. 基础危险度
-        if tile.is_number_tile():
-            # 中张牌基础危险度
-            if 4 <= tile.value <= 6:
-                danger_score += 0.7  # 456最危险
-            elif 3 <= tile.value <= 7:
-                danger_score += 0.5  # 37次危险
-            elif tile.value in [2, 8]:
-                danger_score += 0.3  # 28有一定危险
-            else:  # 1, 9
-                danger_score += 0.1  # 边张相对安全
-        elif tile.tile_type == TileType.JIAN:
-            danger_score += 0.6  # 三元牌较危险
-        else:  # 风牌
-            danger_score += 0.3  # 风牌中等危险
+        if idx in discard_indices:
+            return 0.0  # 现物绝对安全
 
-        # 3. 筋牌理论 (Suji) - 降低危险度
-        if tile.is_number_tile():
-            # 检查是否有对应的筋牌被打出
-            suji_pairs = {
-                1: [4, 7], 2: [5, 8], 3: [6, 9],
-                4: [1, 7], 5: [2, 8], 6: [3, 9],
-                7: [1, 4], 8: [2, 5], 9: [3, 6]
-            }
-
-            for discarded_tile, _ in discard_pool[-10:]:  # 检查最近10张牌
-                if (
-                    discarded_tile.is_number_tile()
-                    and discarded_tile.tile_type == tile.tile_type
-                    and discarded_tile.value in suji_pairs.get(tile.value, [])
-                ):
-                    danger_score *= 0.7  # 筋牌减少危险度
-                    break
+        # 2. 基础危险度，按34索引查表
+        danger_score = _BASE_DANGER_BY_INDEX[idx]
 
-        # 4. 壁理论 (Kabe) - 显著降低危险度
-        if tile.is_number_tile():
-            # 统计同类型同数值的牌已出现次数
-            same_tile_count = 0
-            for visible_tile in all_visible_tiles:
-                if (
-                    visible_tile.is_number_tile()
-                    and visible_tile.tile_type == tile.tile_type
-                    and visible_tile.value == tile.value
-                ):
-                    same_tile_count += 1
-
-            # 如果4张都可见，形成壁
-            if same_tile_count >= 4:
-                # 检查邻近牌(外壁)的危险度
-                adjacent_values = []
-                if tile.value > 1:
-                    adjacent_values.append(tile.value - 1)
-                if tile.value < 9:
-                    adjacent_values.append(tile.value + 1)
-
-                # 壁的外侧牌危险度大幅降低
-                if tile.value in adjacent_values:
-                    danger_score *= 0.3
-            elif same_tile_count >= 3:
-                danger_score *= 0.8  # 3张可见也会降低危险度
+        if idx < 27:
+            # 3. 筋牌理论 (Suji) - 最近10张舍牌中有筋牌，降低危险度
+            if not _SUJI_INDICES[idx].isdisjoint(recent_indices):
+                danger_score *= _SUJI_DANGER_FACTOR
 
-        # 5. 早巡舍牌理论 - 降低危险度
-        if round_number <= 5:  # 前5巡
-            # 检查是否为早巡出现的牌类型
-            early_discards = [tile for tile, _ in discard_pool[:5]]  # 前5张舍牌
-            for early_tile in early_discards:
-                if (
-                    tile.is_number_tile()
-                    and tile.tile_type == early_tile.tile_type
-                    and abs(tile.value - early_tile.value) <= 2
-                ):  # 相近的牌
-                    danger_score *= 0.6  # 早巡相关牌较安全
-                    break
+            # 4. 壁理论 (Kabe) - 同一种牌已可见的张数
+            # 4张都可见时形成壁，壁只影响邻近的牌，这张牌本身的危险度不变
+            if visible_counts[idx] == 3:
+                danger_score *= _KABE_DANGER_FACTOR
 
-        # 6. 生张额外危险度
-        if not appears_in_discard:
-            danger_score += 0.2
+            # 5. 早巡舍牌理论 - 前5巡里前5张舍牌有同花色相近(±2)的牌，降低危险度
+            if round_number <= 5 and idx in early_near_indices:
+                danger_score *= _EARLY_DANGER_FACTOR
+
+        # 6. 生张额外危险度（走到这里说明不是现物）
+        danger_score += _UNSEEN_DANGER_BONUS
 
         # 限制在0.0-1.0范围内
         return min(1.0, max(0.0, danger_score))
@@ -1195,27 +1340,30 @@ class ShantenAI(BaseAI):
             player, available_tiles
         )
         
-        # 按效率排序
-        sorted_tiles = sorted(efficiency_scores.items(), key=lambda x: x[1][0], reverse=True)
+        # 取效率最高的前三名（只需要前三，不对全部候选排序）
+        sorted_tiles = heapq.nlargest(3, efficiency_scores.items(), key=lambda x: x[1][0])
 
-        # 调试用
-        print("打牌效率分析 (分数越高越应该打出):")
-        for i, (tile, (score, ukeire)) in enumerate(sorted_tiles[:3]):
-            print(f"   {i+1}. {tile}: {score:.2f}分, {sum(ukeire.values())}张进张")
-        print()
+        # 调试用，未开启DEBUG时不做任何格式化
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            _logger.debug("打牌效率分析 (分数越高越应该打出):")
+            for i, (tile, (score, ukeire)) in enumerate(sorted_tiles[:3]):
+                _logger.debug(f"   {i+1}. {tile}: {score:.2f}分, {sum(ukeire.values())}张进张")
         
         # 根据难度和准确率选择
         if random.random() < self.calculation_accuracy:
             # 选择最优解
             chosen_tile = sorted_tiles[0][0]
-            print(f"最优选择出的牌: {chosen_tile}")
+            if debug:
+                _logger.debug(f"最优选择出的牌: {chosen_tile}")
             return chosen_tile
         else:
             # 添加一些随机性
             top_choices = sorted_tiles[:min(3, len(sorted_tiles))]
             chosen_entry = random.choice(top_choices)
             chosen_tile = chosen_entry[0]
-            print(f"随机选择出的牌: {chosen_tile}")
+            if debug:
+                _logger.debug(f"随机选择出的牌: {chosen_tile}")
             return chosen_tile
         
         
@@ -1264,23 +1412,13 @@ class ShantenAI(BaseAI):
             # 模拟碰牌后的向听数变化
             peng_tile = context.get('last_tile')  # 要碰的牌
             if peng_tile:
-                # 模拟碰牌后的手牌状态
-                simulated_tiles = player.hand_tiles.copy()
-                # 移除两张相同的牌（碰牌需要手中有两张相同的牌）
-                removed_count = 0
-                for tile in simulated_tiles[:]:
-                    if (tile.tile_type == peng_tile.tile_type and 
-                        tile.value == peng_tile.value and 
-                        tile.feng_type == peng_tile.feng_type and 
-                        tile.jian_type == peng_tile.jian_type):
-                        simulated_tiles.remove(tile)
-                        removed_count += 1
-                        if removed_count >= 2:
-                            break
+                # 模拟碰牌后的手牌状态：直接在计数数组上移除两张相同的牌，不复制手牌、不构造临时面子
+                simulated_counts = ShantenCalculator._player_counts34(player)
+                simulated_counts[peng_tile.idx34] -= min(2, simulated_counts[peng_tile.idx34])
                 
                 # 计算碰牌后的向听数（面子数+1）
-                after_peng_shanten = ShantenCalculator.calculate_shanten(
-                    simulated_tiles, len(player.melds) + 1
+                after_peng_shanten = ShantenCalculator._calculate_shanten_from_counts(
+                    simulated_counts, len(player.melds) + 1
                 )
                 
                 # 根据向听数变化给分
@@ -1311,31 +1449,27 @@ class ShantenAI(BaseAI):
     
     def choose_missing_suit(self, player: Player) -> str:
         """选择缺门 - 基于向听数最小化"""
-        suit_counts = {"万": 0, "筒": 0, "条": 0}
-        suit_tiles = {"万": [], "筒": [], "条": []}
-        
-        for tile in player.hand_tiles:
-            if tile.is_number_tile():
-                suit_name = tile.tile_type.value
-                suit_counts[suit_name] += 1
-                suit_tiles[suit_name].append(tile)
+        tile_counts = ShantenCalculator._player_counts34(player)
         
         # 计算缺每种花色后的向听数
         best_suit = None
         best_shanten = float('inf')
         
-        for suit_name in ["万", "筒", "条"]:
-            # 模拟缺这种花色
-            remaining_tiles = [t for t in player.hand_tiles 
-                             if not (t.is_number_tile() and t.tile_type.value == suit_name)]
+        for suit_id, suit_name in enumerate(SUIT_NAMES):
+            # 模拟缺这种花色：把该花色的9格计数清零，不复制手牌
+            base = suit_id * 9
+            remaining_counts = tile_counts[:base] + [0] * 9 + tile_counts[base + 9:]
             
-            shanten = ShantenCalculator.calculate_shanten(remaining_tiles)
+            shanten = ShantenCalculator._calculate_shanten_from_counts(remaining_counts)
             
             if shanten < best_shanten:
                 best_shanten = shanten
                 best_suit = suit_name
         
-        return best_suit or min(suit_counts, key=suit_counts.get)
+        if best_suit:
+            return best_suit
+        suit_counts = [sum(tile_counts[base:base + 9]) for base in (0, 9, 18)]
+        return SUIT_NAMES[min(range(3), key=suit_counts.__getitem__)]
     
     def choose_exchange_tiles(self, player: Player, count: int = 3) -> List[Tile]:
         """选择换牌 - 基于牌效率优化"""
@@ -1343,21 +1477,25 @@ class ShantenAI(BaseAI):
             return player.hand_tiles[:count]
         # TODO - 应该考虑该花色所有三张组合，并计算去掉这三张后的牌效率，选择效率最高的组合
         
-        # 计算每张牌的保留价值
+        # 计算每张牌的保留价值：当前向听数只算一次，相同的牌只算一次
+        tile_counts = ShantenCalculator._player_counts34(player)
+        current_shanten = ShantenCalculator._calculate_shanten_from_counts(tile_counts)
         tile_values = {}
         for tile in player.hand_tiles:
-            # 移除这张牌后计算向听数
-            remaining_tiles = [t for t in player.hand_tiles if t != tile]
-            shanten_without = ShantenCalculator.calculate_shanten(remaining_tiles)
+            if tile in tile_values:
+                continue
+            
+            # 移除这张牌（所有相同的牌）后计算向听数
+            removed = tile_counts[tile.idx34]
+            tile_counts[tile.idx34] = 0
+            shanten_without = ShantenCalculator._calculate_shanten_from_counts(tile_counts)
+            tile_counts[tile.idx34] = removed
             
             # 保留价值 = 原向听数 - 移除后向听数（越大越应该保留）
-            current_shanten = ShantenCalculator.calculate_shanten(player.hand_tiles)
-            value = current_shanten - shanten_without
-            tile_values[tile] = value
+            tile_values[tile] = current_shanten - shanten_without
         
         # 选择价值最低的牌换出
-        sorted_tiles = sorted(tile_values.items(), key=lambda x: x[1])
-        return [tile for tile, _ in sorted_tiles[:count]]
+        return [tile for tile, _ in heapq.nsmallest(count, tile_values.items(), key=lambda x: x[1])]
     
     def provide_analysis(self, player: Player) -> str:
         """提供向听数分析"""
@@ -1405,19 +1543,21 @@ class ShantenAI(BaseAI):
         analysis.append("   (基于筋牌、壁、现物、早巡理论)")
         analysis.append("")
         
-        # 分析每张候选牌的危险度
+        # 分析每张候选牌的危险度，出牌池和可见牌只整理一次
+        danger_index = TileEfficiencyAnalyzer._build_danger_index(
+            game_context.get('discard_pool', []),
+            game_context.get('all_visible_tiles', [])
+        )
+        round_number = game_context.get('round_number', 1)
         danger_scores = {}
         for tile in candidate_tiles:
-            danger_level = TileEfficiencyAnalyzer.evaluate_tile_danger_level(
-                tile,
-                game_context.get('discard_pool', []),
-                game_context.get('all_visible_tiles', []),
-                game_context.get('round_number', 1)
-            )
-            danger_scores[tile] = danger_level
+            if tile not in danger_scores:
+                danger_scores[tile] = TileEfficiencyAnalyzer._evaluate_danger_from_index(
+                    tile, danger_index, round_number
+                )
         
-        # 按危险度排序
-        sorted_tiles = sorted(danger_scores.items(), key=lambda x: x[1])
+        # 取危险度最低的前5张（只需要前五，不对全部候选排序）
+        sorted_tiles = heapq.nsmallest(5, danger_scores.items(), key=lambda x: x[1])
         
         # 显示分析结果
         for i, (tile, danger_level) in enumerate(sorted_tiles[:5]):  # 显示前5张
@@ -1425,7 +1565,7 @@ class ShantenAI(BaseAI):
             percentage = int(danger_level * 100)
             
             # 分析具体原因
-            reasons = self._analyze_danger_reasons(tile, game_context)
+            reasons = self._analyze_danger_reasons(tile, game_context, danger_index)
             reason_text = f" ({reasons})" if reasons else ""
             
             analysis.append(f"   {i+1}. {tile} - {safety_level} ({percentage}%){reason_text}")
@@ -1438,43 +1578,33 @@ class ShantenAI(BaseAI):
         
         return "\n".join(analysis)
     
-    def _analyze_danger_reasons(self, tile: Tile, game_context: Dict) -> str:
+    def _analyze_danger_reasons(self, tile: Tile, game_context: Dict,
+                                danger_index: Optional[Tuple[Set[int], Set[int], Set[int], List[int]]] = None) -> str:
         """分析危险牌的具体原因"""
         reasons = []
         discard_pool = game_context.get('discard_pool', [])
-        all_visible_tiles = game_context.get('all_visible_tiles', [])
         round_number = game_context.get('round_number', 1)
+        if danger_index is None:
+            danger_index = TileEfficiencyAnalyzer._build_danger_index(
+                discard_pool, game_context.get('all_visible_tiles', [])
+            )
+        discard_indices, recent_indices, _, visible_counts = danger_index
 
         # TODO - 与牌效率的某些方法/代码重合，需要合并
         
         # 检查是否为现物
-        for discarded_tile, _ in discard_pool:
-            if (tile.tile_type == discarded_tile.tile_type and 
-                tile.value == discarded_tile.value and
-                tile.feng_type == discarded_tile.feng_type and
-                tile.jian_type == discarded_tile.jian_type):
-                reasons.append("现物")
-                return "现物-绝对安全"
+        idx = tile.idx34
+        if idx in discard_indices:
+            return "现物-绝对安全"
         
         # 检查筋牌
         if tile.is_number_tile():
-            suji_pairs = {
-                1: [4, 7], 2: [5, 8], 3: [6, 9],
-                4: [1, 7], 5: [2, 8], 6: [3, 9],
-                7: [1, 4], 8: [2, 5], 9: [3, 6]
-            }
-            
-            for discarded_tile, _ in discard_pool[-10:]:
-                if (discarded_tile.tile_type == tile.tile_type and 
-                    discarded_tile.value in suji_pairs.get(tile.value, [])):
-                    reasons.append("筋牌")
-                    break
+            if not _SUJI_INDICES[idx].isdisjoint(recent_indices):
+                reasons.append("筋牌")
         
         # 检查壁
         if tile.is_number_tile():
-            same_tile_count = sum(1 for visible_tile in all_visible_tiles
-                                if visible_tile.tile_type == tile.tile_type and 
-                                   visible_tile.value == tile.value)
+            same_tile_count = visible_counts[idx]
             if same_tile_count >= 4:
                 reasons.append("壁")
             elif same_tile_count >= 3:
@@ -1500,13 +1630,7 @@ class ShantenAI(BaseAI):
         
         # 生张检查
         if tile.is_honor_tile():
-            appears_in_discard = any(
-                discarded_tile.tile_type == tile.tile_type and
-                ((tile.feng_type and discarded_tile.feng_type == tile.feng_type) or
-                 (tile.jian_type and discarded_tile.jian_type == tile.jian_type))
-                for discarded_tile, _ in discard_pool
-            )
-            if not appears_in_discard:
+            if idx not in discard_indices:
                 reasons.append("生张")
         
         return ",".join(reasons) if reasons else "普通" 
@@ -3,138 +3,180 @@
 简单AI实现
 """
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+import heapq
 import random
 
 from .base_ai import BaseAI
-from game.tile import Tile, TileType
+from game.tile import Tile
 from game.player import Player
 from game.game_engine import GameAction
 
+# 数字牌(34索引0-26)同花色±2范围的切片边界 [lo, hi)，用于孤张判断
+_NEIGHBOUR_SPAN = tuple(
+    (max(idx - 2, idx - idx % 9), min(idx + 3, idx - idx % 9 + 9))
+    for idx in range(27)
+)
+
+# 只与牌本身有关的出牌评分，按34索引预先算好：
+# 危险牌（幺九、字牌）-20，字牌在四川麻将中优先打出+25，幺九牌（含字牌）+10
+_STATIC_DISCARD_SCORE = tuple(
+    [-10.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, -10.0] * 3 + [15.0] * 7
+)
+
+# 按难度的动作基础概率（只读，由所有SimpleAI实例共用）
+_ACTION_PROBABILITIES = {
+    "easy": {
+        GameAction.GANG: 0.3,
+        GameAction.PENG: 0.4,
+        GameAction.CHI: 0.3,
+        GameAction.PASS: 0.6
+    },
+    "medium": {
+        GameAction.GANG: 0.5,
+        GameAction.PENG: 0.6,
+        GameAction.CHI: 0.4,
+        GameAction.PASS: 0.4
+    },
+    "hard": {
+        GameAction.GANG: 0.7,
+        GameAction.PENG: 0.8,
+        GameAction.CHI: 0.6,
+        GameAction.PASS: 0.2
+    },
+}
+
+# 响应他人出牌时按优先级依次检查的动作
+_ACTION_PRIORITY = (GameAction.GANG, GameAction.PENG, GameAction.CHI)
+
+# 听牌试探的候选牌下标：按缺门花色编号预先剔除该花色的9种牌
+_PROBE_INDICES_BY_MISSING = tuple(
+    tuple(idx for idx in range(34) if not suit_id * 9 <= idx < suit_id * 9 + 9)
+    for suit_id in range(3)
+)
+
 class SimpleAI(BaseAI):
     """简单AI实现"""
     
+    # 单花色能否拆完的缓存：键为9格计数的tuple，所有SimpleAI实例共用
+    _suit_complete_cache: Dict[Tuple[int, ...], bool] = {}
+    _SUIT_COMPLETE_CACHE_MAX = 200_000
+    
+    # 整手牌是否胡牌的缓存：键为34格计数的bytes，听牌试探和胡牌判断会反复遇到同一手牌
+    _win_cache: Dict[bytes, bool] = {}
+    _WIN_CACHE_MAX = 100_000
+    
     def __init__(self, difficulty: str = "medium"):
         super().__init__(difficulty)
+        # 难度在对局中不变，构造时就选定出牌的随机策略，避免每次出牌都判断难度
+        self._select_discard = {
+            "easy": self._select_discard_easy,
+            "hard": self._select_discard_hard,
+        }.get(difficulty, self._select_discard_medium)
+        # 各动作的基础概率同样只取决于难度，所有实例共用同一张只读表
+        self._action_probs = _ACTION_PROBABILITIES.get(difficulty, _ACTION_PROBABILITIES["medium"])
         
     def choose_discard(self, player: Player, available_tiles: List[Tile]) -> Tile:
         """选择要打出的牌"""
         if not available_tiles:
             return player.hand_tiles[0] if player.hand_tiles else None
         
-        # 计算每张牌的打出优先级
+        # 计算每张牌的打出优先级（手牌直方图只统计一次，相同的牌只算一次）
+        counts34 = self._count_tiles34(player.hand_tiles)
+        priority_by_index = {}
         priorities = []
         for tile in available_tiles:
-            priority = self.calculate_discard_priority(player, tile)
+            priority = priority_by_index.get(tile.idx34)
+            if priority is None:
+                priority = self.calculate_discard_priority(player, tile, counts34)
+                priority_by_index[tile.idx34] = priority
             priorities.append((tile, priority))
         
-        # 按优先级排序，选择优先级最高的
-        priorities.sort(key=lambda x: x[1], reverse=True)
-        
         # 根据难度添加一些随机性
-        if self.difficulty == "easy":
-            # 简单AI：30%概率选择最优，70%随机
-            if random.random() < 0.3:
-                return priorities[0][0]
-            else:
-                return random.choice(available_tiles)
-        elif self.difficulty == "hard":
-            # 困难AI：90%概率选择最优，10%选择次优
-            if random.random() < 0.9:
-                return priorities[0][0]
-            else:
-                return priorities[min(1, len(priorities)-1)][0]
-        else:  # medium
-            # 中等AI：70%概率选择最优，30%选择前三名
-            if random.random() < 0.7:
-                return priorities[0][0]
-            else:
-                top_choices = priorities[:min(3, len(priorities))]
-                return random.choice(top_choices)[0]
+        return self._select_discard(priorities, available_tiles)
+    
+    # 以下按难度选牌，只取需要的前几名，不对全部候选排序
     
-    def calculate_discard_priority(self, player: Player, tile: Tile) -> float:
+    @staticmethod
+    def _select_discard_easy(priorities: List[tuple], available_tiles: List[Tile]) -> Tile:
+        """简单AI：30%概率选择最优，70%随机"""
+        if random.random() < 0.3:
+            return max(priorities, key=lambda x: x[1])[0]
+        else:
+            return random.choice(available_tiles)
+    
+    @staticmethod
+    def _select_discard_hard(priorities: List[tuple], available_tiles: List[Tile]) -> Tile:
+        """困难AI：90%概率选择最优，10%选择次优"""
+        if random.random() < 0.9:
+            return max(priorities, key=lambda x: x[1])[0]
+        else:
+            return heapq.nlargest(2, priorities, key=lambda x: x[1])[-1][0]
+    
+    @staticmethod
+    def _select_discard_medium(priorities: List[tuple], available_tiles: List[Tile]) -> Tile:
+        """中等AI：70%概率选择最优，30%选择前三名"""
+        if random.random() < 0.7:
+            return max(priorities, key=lambda x: x[1])[0]
+        else:
+            top_choices = heapq.nlargest(3, priorities, key=lambda x: x[1])
+            return random.choice(top_choices)[0]
+    
+    def calculate_discard_priority(self, player: Player, tile: Tile,
+                                   counts34: Optional[List[int]] = None) -> float:
         """计算出牌优先级（越高越应该打出）"""
+        if counts34 is None:
+            counts34 = self._count_tiles34(player.hand_tiles)
         priority = 0.0
         
         # 1. 缺门牌优先打出（四川麻将规则）
-        if hasattr(player, 'missing_suit') and player.missing_suit:
-            missing_suit_type = {
-                "万": TileType.WAN,
-                "筒": TileType.TONG,
-                "条": TileType.TIAO
-            }.get(player.missing_suit)
-            
-            if tile.tile_type == missing_suit_type:
-                priority += 100.0  # 缺门牌必须优先打出
+        if tile.idx34 // 9 == self._missing_suit_id(player):
+            priority += 100.0  # 缺门牌必须优先打出
         
         # 2. 孤张牌优先打出
-        if self._is_isolated_tile(player, tile):
+        if self._is_isolated_tile(tile, counts34):
             priority += 50.0
         
         # 3. 边张和嵌张优先级较高
-        if self._is_edge_or_middle_wait(player, tile):
+        if self._is_edge_or_middle_wait(tile, counts34):
             priority += 30.0
         
-        # 4. 危险牌（可能让别人胡牌）降低优先级
-        if self._is_dangerous_tile(tile):
-            priority -= 20.0
-        
-        # 5. 字牌（风、箭）在四川麻将中优先级较高
-        if tile.tile_type in [TileType.FENG, TileType.JIAN]:
-            priority += 25.0
-        
-        # 6. 幺九牌适中优先级
-        if tile.is_terminal():
-            priority += 10.0
+        # 4-6. 只与牌本身有关的部分按34索引查表
+        priority += _STATIC_DISCARD_SCORE[tile.idx34]
         
         return priority
     
-    def _is_isolated_tile(self, player: Player, tile: Tile) -> bool:
+    @staticmethod
+    def _is_isolated_tile(tile: Tile, counts34: List[int]) -> bool:
         """检查是否为孤张牌"""
-        if not tile.is_number_tile():
+        idx = tile.idx34
+        if idx >= 27:
             # 字牌检查是否有对子或刻子
-            count = sum(1 for t in player.hand_tiles if str(t) == str(tile))
-            return count == 1
-        
-        # 数字牌检查周围是否有连接
-        same_suit_tiles = [t for t in player.hand_tiles if t.tile_type == tile.tile_type]
-        values = [t.value for t in same_suit_tiles]
-        
-        # 检查是否有相邻的牌
-        has_neighbor = False
-        for v in values:
-            if v != tile.value and abs(v - tile.value) <= 2:
-                has_neighbor = True
-                break
+            return counts34[idx] == 1
         
-        return not has_neighbor
+        # 数字牌检查同花色±2范围内（不含同一点数）是否有牌：窗口内的牌只有这张牌自己
+        lo, hi = _NEIGHBOUR_SPAN[idx]
+        return sum(counts34[lo:hi]) == counts34[idx]
     
-    def _is_edge_or_middle_wait(self, player: Player, tile: Tile) -> bool:
+    @staticmethod
+    def _is_edge_or_middle_wait(tile: Tile, counts34: List[int]) -> bool:
         """检查是否为边张或嵌张"""
-        if not tile.is_number_tile():
+        idx = tile.idx34
+        if idx >= 27:
             return False
         
-        same_suit_tiles = [t for t in player.hand_tiles if t.tile_type == tile.tile_type]
-        values = [t.value for t in same_suit_tiles if t.value != tile.value]
+        rank = idx % 9
+        has_lower = rank > 0 and counts34[idx - 1] > 0
+        has_upper = rank < 8 and counts34[idx + 1] > 0
         
         # 检查边张（12, 89）
-        if tile.value in [1, 2] and (tile.value + 1) in values:
+        if rank <= 1 and has_upper:
             return True
-        if tile.value in [8, 9] and (tile.value - 1) in values:
+        if rank >= 7 and has_lower:
             return True
         
         # 检查嵌张（135中的3）
-        if (tile.value - 1) in values and (tile.value + 1) in values:
-            return True
-        
-        return False
-    
-    def _is_dangerous_tile(self, tile: Tile) -> bool:
-        """检查是否为危险牌（简化判断）"""
-        # 简化的危险牌判断：中张牌相对安全，边张和字牌相对危险
-        if tile.is_number_tile():
-            return tile.value in [1, 9]  # 幺九牌
-        return True  # 字牌
+        return has_lower and has_upper
     
     def decide_action(self, player: Player, available_actions: List[GameAction], 
                      context: Dict) -> Optional[GameAction]:
@@ -145,13 +187,10 @@ class SimpleAI(BaseAI):
             if self._should_win(player, context):
                 return GameAction.WIN
         
-        # 根据难度和策略调整行动概率
-        action_probs = self._get_action_probabilities()
-        
-        # 按优先级检查动作
-        for action in [GameAction.GANG, GameAction.PENG, GameAction.CHI]:
+        # 按优先级检查动作，行动概率在构造时已按难度选定
+        for action in _ACTION_PRIORITY:
             if action in available_actions:
-                if self._should_take_action(player, action, context, action_probs):
+                if self._should_take_action(player, action, context, self._action_probs):
                     return action
         
         return GameAction.PASS
@@ -163,184 +202,168 @@ class SimpleAI(BaseAI):
     
     def _can_actually_win(self, player: Player, new_tile: Optional[Tile] = None) -> bool:
         """检查是否真的可以胡牌（更精确的检查）"""
-        # 准备检查的手牌
-        test_tiles = player.hand_tiles[:]
+        # 先做最便宜的判断，不满足时不必拼手牌、统计计数
+        # 检查牌数是否正确（手牌+新牌+副露共14张）
+        total_tiles = len(player.hand_tiles) + sum(len(meld.tiles) for meld in player.melds)
         if new_tile:
-            test_tiles.append(new_tile)
-        
-        # 加上已经组合的牌
-        for meld in player.melds:
-            test_tiles.extend(meld.tiles)
-        
-        # 检查牌数是否正确（14张）
-        if len(test_tiles) != 14:
+            total_tiles += 1
+        if total_tiles != 14:
             return False
         
-        # 检查缺门条件（四川麻将）
-        if not self._check_missing_suit_condition(player, test_tiles):
+        # 检查缺门条件（四川麻将）：新牌本身是缺门的牌时直接排除
+        missing_suit_id = self._missing_suit_id(player)
+        if missing_suit_id is None:
             return False
-        
-        # 检查是否为七对子
-        if self._is_seven_pairs(test_tiles):
-            return True
-        
-        # 检查基本胡牌牌型（4个面子+1个对子）
-        return self._check_basic_win_pattern(test_tiles)
-    
-    def _check_missing_suit_condition(self, player: Player, tiles: List[Tile]) -> bool:
-        """检查缺门条件"""
-        if not hasattr(player, 'missing_suit') or not player.missing_suit:
+        if new_tile and new_tile.idx34 // 9 == missing_suit_id:
             return False
         
-        missing_suit_type = {
-            "万": TileType.WAN,
-            "筒": TileType.TONG,
-            "条": TileType.TIAO
-        }.get(player.missing_suit)
+        # 手牌、新牌和副露合在一起按34索引计数，之后只在计数上判断
+        tile_counts = self._count_tiles34(player.hand_tiles)
+        if new_tile:
+            tile_counts[new_tile.idx34] += 1
+        for meld in player.melds:
+            for tile in meld.tiles:
+                tile_counts[tile.idx34] += 1
         
-        if not missing_suit_type:
+        # 确保手牌和副露中没有缺门的牌
+        missing_base = missing_suit_id * 9
+        if any(tile_counts[missing_base:missing_base + 9]):
             return False
         
-        # 确保没有缺门的牌
-        has_missing_suit = any(tile.tile_type == missing_suit_type for tile in tiles)
-        return not has_missing_suit
+        return self._is_winning_counts(tile_counts)
     
-    def _is_seven_pairs(self, tiles: List[Tile]) -> bool:
-        """检查是否为七对子"""
-        if len(tiles) != 14:
-            return False
-        
-        tile_counts = {}
-        for tile in tiles:
-            tile_key = str(tile)
-            tile_counts[tile_key] = tile_counts.get(tile_key, 0) + 1
-        
+    @staticmethod
+    def _is_winning_counts(tile_counts: List[int]) -> bool:
+        """14张牌的34索引计数是否为胡牌牌型（七对子或4个面子+1个对子），结果按计数缓存"""
+        cache = SimpleAI._win_cache
+        key = bytes(tile_counts)
+        wins = cache.get(key)
+        if wins is not None:
+            return wins
+        
+        # 检查是否为七对子，再检查基本胡牌牌型（4个面子+1个对子）
+        wins = SimpleAI._is_seven_pairs(tile_counts) or SimpleAI._check_basic_win_pattern(tile_counts)
+        
+        if len(cache) >= SimpleAI._WIN_CACHE_MAX:
+            cache.clear()
+        cache[key] = wins
+        return wins
+    
+    @staticmethod
+    def _is_seven_pairs(tile_counts: List[int]) -> bool:
+        """检查是否为七对子（14张牌的34索引计数）"""
         # 必须有7种不同的牌，每种2张
-        return len(tile_counts) == 7 and all(count == 2 for count in tile_counts.values())
+        return tile_counts.count(2) == 7
     
-    def _check_basic_win_pattern(self, tiles: List[Tile]) -> bool:
-        """检查基本胡牌牌型（4个面子+1个对子）"""
-        # 统计每种牌的数量
-        tile_counts = {}
-        for tile in tiles:
-            key = str(tile)
-            tile_counts[key] = tile_counts.get(key, 0) + 1
-        
-        return self._try_form_melds(tile_counts, 0, False)
+    @staticmethod
+    def _check_basic_win_pattern(tile_counts: List[int]) -> bool:
+        """检查基本胡牌牌型（4个面子+1个对子），按花色分组查表"""
+        pair_groups = 0
+        
+        # 数字牌：每个花色单独判断能否拆完，张数余2的花色里带着对子
+        for base in (0, 9, 18):
+            suit = tuple(tile_counts[base:base + 9])
+            remainder = sum(suit) % 3
+            if remainder == 1:
+                return False
+            if remainder == 2:
+                pair_groups += 1
+            if not SimpleAI._is_suit_complete(suit):
+                return False
+        
+        # 字牌不能组成顺子，每种只能拆成刻子，张数余2时另带一个对子
+        for count in tile_counts[27:]:
+            remainder = count % 3
+            if remainder == 1:
+                return False
+            if remainder == 2:
+                pair_groups += 1
+        
+        # 14张牌全部拆完且只有一个对子，即4个面子+1个对子
+        return pair_groups == 1
     
-    def _try_form_melds(self, tile_counts: Dict[str, int], melds_formed: int, has_pair: bool) -> bool:
-        """尝试组成面子"""
-        # 如果已经组成了4个面子和1个对子
-        if melds_formed == 4 and has_pair:
-            return all(count == 0 for count in tile_counts.values())
-        
-        # 如果牌已经用完但还没形成完整的胡牌牌型
-        if all(count == 0 for count in tile_counts.values()):
-            return False
-        
-        # 找到第一个还有牌的类型
-        tile_key = None
-        for key, count in tile_counts.items():
-            if count > 0:
-                tile_key = key
-                break
-        
-        if tile_key is None:
-            return False
-        
-        count = tile_counts[tile_key]
-        
-        # 尝试组成对子（如果还没有对子）
-        if not has_pair and count >= 2:
-            tile_counts[tile_key] -= 2
-            if self._try_form_melds(tile_counts, melds_formed, True):
-                tile_counts[tile_key] += 2
-                return True
-            tile_counts[tile_key] += 2
+    @staticmethod
+    def _is_suit_complete(suit: Tuple[int, ...]) -> bool:
+        """单花色9格计数能否恰好拆成若干面子（张数余2时另带一个对子），结果按计数缓存"""
+        cache = SimpleAI._suit_complete_cache
+        complete = cache.get(suit)
+        if complete is not None:
+            return complete
+        
+        counts = list(suit)
+        if sum(counts) % 3 == 2:
+            # 枚举对子的位置，其余部分必须全部是面子
+            complete = False
+            for rank in range(9):
+                if counts[rank] >= 2:
+                    counts[rank] -= 2
+                    complete = SimpleAI._form_suit_melds(counts, 0)
+                    counts[rank] += 2
+                    if complete:
+                        break
+        else:
+            complete = SimpleAI._form_suit_melds(counts, 0)
+        
+        if len(cache) >= SimpleAI._SUIT_COMPLETE_CACHE_MAX:
+            cache.clear()
+        cache[suit] = complete
+        return complete
+    
+    @staticmethod
+    def _form_suit_melds(counts: List[int], start: int) -> bool:
+        """单花色计数能否全部拆成刻子和顺子，总是从最小的剩余点数开始拆"""
+        # 找到第一个还有牌的点数，之前的点数都已拆完
+        while start < 9 and counts[start] == 0:
+            start += 1
+        if start == 9:
+            return True
         
         # 尝试组成刻子
-        if count >= 3:
-            tile_counts[tile_key] -= 3
-            if self._try_form_melds(tile_counts, melds_formed + 1, has_pair):
-                tile_counts[tile_key] += 3
+        if counts[start] >= 3:
+            counts[start] -= 3
+            formed = SimpleAI._form_suit_melds(counts, start)
+            counts[start] += 3
+            if formed:
                 return True
-            tile_counts[tile_key] += 3
-        
-        # 尝试组成顺子（只对数字牌）
-        if self._is_number_tile_key(tile_key):
-            if self._try_form_sequence(tile_counts, tile_key):
-                if self._try_form_melds(tile_counts, melds_formed + 1, has_pair):
-                    self._restore_sequence(tile_counts, tile_key)
-                    return True
-                self._restore_sequence(tile_counts, tile_key)
-        
-        return False
-    
-    def _is_number_tile_key(self, tile_key: str) -> bool:
-        """检查是否为数字牌键"""
-        return tile_key.endswith("万") or tile_key.endswith("筒") or tile_key.endswith("条")
-    
-    def _try_form_sequence(self, tile_counts: Dict[str, int], tile_key: str) -> bool:
-        """尝试组成顺子"""
-        if not self._is_number_tile_key(tile_key):
-            return False
-        
-        # 解析牌的数值和花色
-        value = int(tile_key[0])
-        suffix = tile_key[1:]
         
-        # 检查是否可以组成顺子
-        if value <= 7:  # 可以作为顺子的开头
-            key1 = f"{value}{suffix}"
-            key2 = f"{value + 1}{suffix}"
-            key3 = f"{value + 2}{suffix}"
-            
-            if (tile_counts.get(key1, 0) >= 1 and 
-                tile_counts.get(key2, 0) >= 1 and 
-                tile_counts.get(key3, 0) >= 1):
-                
-                tile_counts[key1] -= 1
-                tile_counts[key2] -= 1
-                tile_counts[key3] -= 1
-                return True
+        # 尝试组成顺子（点数7以下才能作为顺子的开头）
+        if start <= 6 and counts[start + 1] and counts[start + 2]:
+            counts[start] -= 1
+            counts[start + 1] -= 1
+            counts[start + 2] -= 1
+            formed = SimpleAI._form_suit_melds(counts, start)
+            counts[start] += 1
+            counts[start + 1] += 1
+            counts[start + 2] += 1
+            return formed
         
         return False
     
-    def _restore_sequence(self, tile_counts: Dict[str, int], tile_key: str):
-        """恢复顺子"""
-        value = int(tile_key[0])
-        suffix = tile_key[1:]
-        
-        key1 = f"{value}{suffix}"
-        key2 = f"{value + 1}{suffix}"
-        key3 = f"{value + 2}{suffix}"
-        
-        tile_counts[key1] += 1
-        tile_counts[key2] += 1
-        tile_counts[key3] += 1
-    
     def _is_close_to_win(self, player: Player) -> bool:
         """判断是否接近胡牌（听牌）"""
-        from game.tile import FengType, JianType
-        
-        # 检查是否只差一张牌就能胡牌
-        # 检查数字牌
-        for tile_type in [TileType.WAN, TileType.TONG, TileType.TIAO]:
-            for value in range(1, 10):
-                test_tile = Tile(tile_type, value)
-                if self._can_actually_win(player, test_tile):
-                    return True
-        
-        # 检查风牌
-        for feng_type in FengType:
-            test_tile = Tile(TileType.FENG, feng_type=feng_type)
-            if self._can_actually_win(player, test_tile):
-                return True
+        # 手牌和副露只统计一次，之后在同一份计数上逐一加入34种牌试探
+        tile_counts = self._count_tiles34(player.hand_tiles)
+        for meld in player.melds:
+            for tile in meld.tiles:
+                tile_counts[tile.idx34] += 1
+        
+        # 加上一张牌后必须正好14张
+        if sum(tile_counts) != 13:
+            return False
+        
+        # 缺门条件（四川麻将）：已有缺门的牌则不可能胡，缺门花色的牌也不用试探
+        missing_suit_id = self._missing_suit_id(player)
+        if missing_suit_id is None:
+            return False
+        missing_base = missing_suit_id * 9
+        if any(tile_counts[missing_base:missing_base + 9]):
+            return False
         
-        # 检查箭牌
-        for jian_type in JianType:
-            test_tile = Tile(TileType.JIAN, jian_type=jian_type)
-            if self._can_actually_win(player, test_tile):
+        for idx in _PROBE_INDICES_BY_MISSING[missing_suit_id]:
+            tile_counts[idx] += 1
+            wins = self._is_winning_counts(tile_counts)
+            tile_counts[idx] -= 1
+            if wins:
                 return True
         
         return False
@@ -368,56 +391,18 @@ class SimpleAI(BaseAI):
         
         return random.random() < base_prob
     
-    def _get_action_probabilities(self) -> Dict[GameAction, float]:
-        """获取动作概率"""
-        if self.difficulty == "easy":
-            return {
-                GameAction.GANG: 0.3,
-                GameAction.PENG: 0.4,
-                GameAction.CHI: 0.3,
-                GameAction.PASS: 0.6
-            }
-        elif self.difficulty == "hard":
-            return {
-                GameAction.GANG: 0.7,
-                GameAction.PENG: 0.8,
-                GameAction.CHI: 0.6,
-                GameAction.PASS: 0.2
-            }
-        else:  # medium
-            return {
-                GameAction.GANG: 0.5,
-                GameAction.PENG: 0.6,
-                GameAction.CHI: 0.4,
-                GameAction.PASS: 0.4
-            }
-    
     def _is_useful_peng(self, player: Player, tile: Optional[Tile]) -> bool:
         """判断碰牌是否有用"""
         if not tile:
             return False
         
         # 如果这张牌能帮助完成缺门，则不碰
-        if hasattr(player, 'missing_suit') and player.missing_suit:
-            missing_suit_type = {
-                "万": TileType.WAN,
-                "筒": TileType.TONG,
-                "条": TileType.TIAO
-            }.get(player.missing_suit)
-            
-            if tile.tile_type == missing_suit_type:
-                return False  # 缺门牌不应该碰
+        if tile.idx34 // 9 == self._missing_suit_id(player):
+            return False  # 缺门牌不应该碰
         
         return True
     
     def choose_missing_suit(self, player: Player) -> str:
         """选择缺门"""
-        # 统计各花色的牌数
-        suit_counts = {"万": 0, "筒": 0, "条": 0}
-        
-        for tile in player.hand_tiles:
-            if tile.is_number_tile():
-                suit_counts[tile.tile_type.value] += 1
-        
         # 选择牌数最少的花色作为缺门
-        return min(suit_counts, key=suit_counts.get) 
\ No newline at end of file
+        return self._fewest_suit(player)[0] 
\ No newline at end of file
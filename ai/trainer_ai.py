@@ -3,7 +3,8 @@
 训练师AI - 提供指导和建议
 """
 
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Dict, Tuple, Deque
+from collections import deque
 import random
 
 from .base_ai import BaseAI
@@ -11,27 +12,58 @@ from game.tile import Tile, TileType
 from game.player import Player
 from game.game_engine import GameAction
 
+# 教学要点为固定文本，只构建一次
+_TEACHING_POINTS: Tuple[str, ...] = (
+    "🎓 麻将基础：",
+    "• 四川麻将需要先选择缺一门（万、筒、条中的一种）",
+    "• 胡牌需要4个面子（刻子或顺子）+ 1个对子",
+    "• 刻子：三张相同的牌；顺子：同花色连续三张",
+    "",
+    "🎯 策略建议：",
+    "• 优先打出缺门的牌和孤张牌",
+    "• 注意观察其他玩家的打牌，避免让别人胡牌",
+    "• 杠牌分数高但有风险，要谨慎使用",
+    "• 碰牌相对安全，可以快速组成面子",
+    "",
+    "⚡ 特殊牌型：",
+    "• 碰碰胡：全部刻子，分数翻倍",
+    "• 清一色：同一花色，分数x4",
+    "• 字一色：全部字牌，分数x4",
+)
+
+# 同花色点数的9位掩码中，位i代表点数i+1
+# 相邻位掩码：点数±1
+_NEIGHBOR_MASK = tuple(((1 << i) >> 1 | (1 << i) << 1) & 0x1FF for i in range(9))
+# 能与该点数组成顺子的两张牌：(v-2,v-1)、(v-1,v+1)、(v+1,v+2)，只保留都在1-9内的组合
+_SEQUENCE_MASKS = tuple(
+    tuple((1 << a) | (1 << b) for a, b in ((i - 2, i - 1), (i - 1, i + 1), (i + 1, i + 2)) if a >= 0 and b <= 8)
+    for i in range(9)
+)
+
+# 保留的历史建议条数上限
+_ADVICE_HISTORY_MAX = 128
+
 class TrainerAI(BaseAI):
     """训练师AI - 专门用于训练模式，提供指导"""
     
     def __init__(self):
         super().__init__("trainer")
-        self.advice_history: List[str] = []
+        # 只保留最近的建议，长时间训练不会无限增长
+        self.advice_history: Deque[str] = deque(maxlen=_ADVICE_HISTORY_MAX)
         self.teaching_points: List[str] = []
         
     def choose_discard(self, player: Player, available_tiles: List[Tile]) -> Tile:
         """选择要打出的牌"""
         # 训练师AI相对保守，注重教学
         priorities = []
+        counts34 = self._count_tiles34(player.hand_tiles)
         
         for tile in available_tiles:
-            priority = self.calculate_discard_priority(player, tile)
+            priority = self.calculate_discard_priority(player, tile, counts34)
             priorities.append((tile, priority))
         
-        # 按优先级排序
-        priorities.sort(key=lambda x: x[1], reverse=True)
-        
-        return priorities[0][0]
+        # 选择优先级最高的牌
+        return max(priorities, key=lambda x: x[1])[0]
     
     def decide_action(self, player: Player, available_actions: List[GameAction], 
                      context: Dict) -> Optional[GameAction]:
@@ -59,15 +91,8 @@ class TrainerAI(BaseAI):
     
     def choose_missing_suit(self, player: Player) -> str:
         """选择缺门"""
-        # 统计各花色的牌数
-        suit_counts = {"万": 0, "筒": 0, "条": 0}
-        
-        for tile in player.hand_tiles:
-            if tile.is_number_tile():
-                suit_counts[tile.tile_type.value] += 1
-        
         # 选择牌数最少的花色作为缺门
-        return min(suit_counts, key=suit_counts.get)
+        return self._fewest_suit(player)[0]
     
     def provide_exchange_advice(self, player: Player) -> str:
         """提供换三张的专业建议"""
@@ -176,17 +201,17 @@ class TrainerAI(BaseAI):
             "isolated": isolated
         }
     
+    @staticmethod
+    def _count_values(values: List[int]) -> List[int]:
+        """按点数统计张数，下标即点数，0和10留空便于检查相邻点数"""
+        value_counts = [0] * 11
+        for value in values:
+            value_counts[value] += 1
+        return value_counts
+    
     def _count_pairs_in_suit(self, values: List[int]) -> int:
         """统计对子数量"""
-        pairs = 0
-        i = 0
-        while i < len(values) - 1:
-            if values[i] == values[i + 1]:
-                pairs += 1
-                i += 2  # 跳过这一对
-            else:
-                i += 1
-        return pairs
+        return sum(count // 2 for count in self._count_values(values))
     
     def _count_potential_sequences_in_suit(self, values: List[int]) -> int:
         """统计潜在顺子数量（用于换牌分析）"""
@@ -206,17 +231,12 @@ class TrainerAI(BaseAI):
     
     def _count_isolated_tiles(self, values: List[int]) -> int:
         """统计孤张数量"""
-        isolated = 0
-        for value in set(values):
-            # 检查是否为孤张（前后都没有相邻的牌）
-            has_neighbor = False
-            for other_value in values:
-                if other_value != value and abs(other_value - value) <= 1:
-                    has_neighbor = True
-                    break
-            if not has_neighbor:
-                isolated += values.count(value)
-        return isolated
+        value_counts = self._count_values(values)
+        # 孤张：前后都没有相邻的牌
+        return sum(
+            value_counts[value] for value in range(1, 10)
+            if value_counts[value - 1] == 0 and value_counts[value + 1] == 0
+        )
     
     def _recommend_best_exchange(self, suit_analysis: Dict) -> Dict:
         """推荐最佳换牌方案"""
@@ -298,10 +318,13 @@ class TrainerAI(BaseAI):
         # 按牌值排序，便于分析
         sorted_tiles = sorted(tiles, key=lambda t: t.value)
         
+        # 该花色各点数张数和存在掩码只统计一次
+        value_counts, value_mask = self._build_value_index(sorted_tiles)
+        
         # 计算每张牌的交换价值（价值越高越适合交换出去）
         tile_values = []
         for tile in sorted_tiles:
-            value = self._calculate_tile_exchange_value(tile, sorted_tiles)
+            value = self._calculate_tile_exchange_value(tile, value_counts, value_mask)
             tile_values.append((tile, value))
         
         # 按交换价值排序（价值高的优先交换）
@@ -314,21 +337,37 @@ class TrainerAI(BaseAI):
         # 生成选择理由
         reasons = []
         for i, (tile, value) in enumerate(zip(selected, selected_values)):
-            tile_reason = self._explain_tile_selection_reason(tile, value, sorted_tiles)
+            tile_reason = self._explain_tile_selection_reason(tile, value, value_counts, value_mask)
             reasons.append(f"{str(tile)}({tile_reason})")
         
         reason_text = "、".join(reasons)
         
         return selected, reason_text
     
-    def _explain_tile_selection_reason(self, tile: Tile, exchange_value: float, all_tiles: List[Tile]) -> str:
+    @staticmethod
+    def _build_value_index(all_tiles: List[Tile]) -> Tuple[List[int], int]:
+        """
+        统计同花色牌的点数分布
+        
+        Returns:
+            (各点数张数（下标为点数-1）, 9位存在掩码)
+        """
+        value_counts = [0] * 9
+        value_mask = 0
+        for t in all_tiles:
+            value_counts[t.value - 1] += 1
+            value_mask |= 1 << (t.value - 1)
+        return value_counts, value_mask
+    
+    def _explain_tile_selection_reason(self, tile: Tile, exchange_value: float,
+                                       value_counts: List[int], value_mask: int) -> str:
         """
         解释单张牌被选择的理由
         
         Args:
             tile: 被选择的牌
             exchange_value: 该牌的交换价值分数
-            all_tiles: 该花色所有牌
+            value_counts, value_mask: 该花色所有牌的点数统计（见 _build_value_index）
             
         Returns:
             选择理由的文字描述
@@ -336,11 +375,10 @@ class TrainerAI(BaseAI):
         tile_value = tile.value
         
         # 统计相同牌的数量
-        same_count = sum(1 for t in all_tiles if t.value == tile_value)
+        same_count = value_counts[tile_value - 1]
         
-        # 统计相邻牌的数量
-        adjacent_count = sum(1 for t in all_tiles 
-                           if abs(t.value - tile_value) == 1)
+        # 统计相邻点数的数量
+        adjacent_count = (value_mask & _NEIGHBOR_MASK[tile_value - 1]).bit_count()
         
         reasons = []
         
@@ -357,7 +395,7 @@ class TrainerAI(BaseAI):
             reasons.append("破坏对子")
         
         # 检查顺子潜力
-        can_form_sequence = self._can_form_sequence_with_tile(tile, all_tiles)
+        can_form_sequence = self._can_form_sequence_with_tile(tile, value_mask)
         if can_form_sequence:
             reasons.append("破坏顺子")
         
@@ -380,13 +418,13 @@ class TrainerAI(BaseAI):
         
         return "、".join(reasons)
     
-    def _can_form_sequence_with_tile(self, tile: Tile, all_tiles: List[Tile]) -> bool:
+    def _can_form_sequence_with_tile(self, tile: Tile, value_mask: int) -> bool:
         """
         检查该牌是否能与其他牌组成顺子
         
         Args:
             tile: 目标牌
-            all_tiles: 该花色所有牌
+            value_mask: 该花色所有牌的点数存在掩码
             
         Returns:
             是否能组成顺子
@@ -394,30 +432,11 @@ class TrainerAI(BaseAI):
         if tile.is_honor_tile():
             return False
         
-        tile_value = tile.value
-        
-        # 检查是否能组成顺子
-        for offset in [-2, -1, 1, 2]:
-            if 1 <= tile_value + offset <= 9:
-                # 检查是否有足够的牌组成顺子
-                needed_values = []
-                if offset == -2:  # 检查 target-2, target-1, target
-                    needed_values = [tile_value-2, tile_value-1]
-                elif offset == -1:  # 检查 target-1, target, target+1
-                    needed_values = [tile_value-1, tile_value+1]
-                elif offset == 1:   # 检查 target, target+1, target+2
-                    needed_values = [tile_value+1, tile_value+2]
-                elif offset == 2:   # 检查 target-1, target, target+1
-                    needed_values = [tile_value-1, tile_value+1]
-                
-                if all(1 <= v <= 9 and 
-                      any(t.value == v for t in all_tiles) 
-                      for v in needed_values):
-                    return True
-        
-        return False
+        # 检查 (v-2,v-1)、(v-1,v+1)、(v+1,v+2) 中是否有两张都在手
+        return any(value_mask & mask == mask for mask in _SEQUENCE_MASKS[tile.value - 1])
     
-    def _calculate_tile_exchange_value(self, target_tile: Tile, all_tiles: List[Tile]) -> float:
+    def _calculate_tile_exchange_value(self, target_tile: Tile,
+                                       value_counts: List[int], value_mask: int) -> float:
         """
         计算单张牌的交换价值
         
@@ -431,7 +450,7 @@ class TrainerAI(BaseAI):
         
         Args:
             target_tile: 目标牌
-            all_tiles: 该花色所有牌
+            value_counts, value_mask: 该花色所有牌的点数统计（见 _build_value_index）
             
         Returns:
             交换价值分数，越高越适合交换
@@ -440,11 +459,10 @@ class TrainerAI(BaseAI):
         tile_value = target_tile.value
         
         # 统计相同牌的数量
-        same_count = sum(1 for t in all_tiles if t.value == tile_value)
+        same_count = value_counts[tile_value - 1]
         
-        # 统计相邻牌的数量
-        adjacent_count = sum(1 for t in all_tiles 
-                           if abs(t.value - tile_value) == 1)
+        # 统计相邻点数的数量
+        adjacent_count = (value_mask & _NEIGHBOR_MASK[tile_value - 1]).bit_count()
         
         # 1. 孤张牌判断（前后都没有相邻牌，且只有一张）
         if same_count == 1 and adjacent_count == 0:
@@ -461,26 +479,7 @@ class TrainerAI(BaseAI):
             value -= 40  # 对子很宝贵，不要轻易拆散
         
         # 4. 顺子潜力分析
-        # 检查是否能组成顺子
-        can_form_sequence = False
-        for offset in [-2, -1, 1, 2]:
-            if 1 <= tile_value + offset <= 9:
-                # 检查是否有足够的牌组成顺子
-                needed_values = []
-                if offset == -2:  # 检查 target-2, target-1, target
-                    needed_values = [tile_value-2, tile_value-1]
-                elif offset == -1:  # 检查 target-1, target, target+1
-                    needed_values = [tile_value-1, tile_value+1]
-                elif offset == 1:   # 检查 target, target+1, target+2
-                    needed_values = [tile_value+1, tile_value+2]
-                elif offset == 2:   # 检查 target-1, target, target+1
-                    needed_values = [tile_value-1, tile_value+1]
-                
-                if all(1 <= v <= 9 and 
-                      any(t.value == v for t in all_tiles) 
-                      for v in needed_values):
-                    can_form_sequence = True
-                    break
+        can_form_sequence = self._can_form_sequence_with_tile(target_tile, value_mask)
         
         if can_form_sequence:
             value -= 25  # 能组成顺子的牌价值较低
@@ -504,21 +503,18 @@ class TrainerAI(BaseAI):
         advice.append("🎲 选择缺门策略分析：")
         
         # 统计各花色情况
-        suit_counts = {"万": 0, "筒": 0, "条": 0}
         suit_tiles = {"万": [], "筒": [], "条": []}
         
         for tile in player.hand_tiles:
             if tile.is_number_tile():
-                suit_name = tile.tile_type.value
-                suit_counts[suit_name] += 1
-                suit_tiles[suit_name].append(tile)
+                suit_tiles[tile.tile_type.value].append(tile)
         
         # 分析各花色的缺门价值
         suit_analysis = {}
         for suit_name in ["万", "筒", "条"]:
             analysis = self._analyze_missing_suit_value(suit_tiles[suit_name])
             suit_analysis[suit_name] = {
-                'count': suit_counts[suit_name],
+                'count': len(suit_tiles[suit_name]),
                 'tiles': suit_tiles[suit_name],
                 'analysis': analysis
             }
@@ -634,14 +630,7 @@ class TrainerAI(BaseAI):
     
     def _advice_missing_suit(self, player: Player) -> str:
         """缺门建议"""
-        suit_counts = {"万": 0, "筒": 0, "条": 0}
-        
-        for tile in player.hand_tiles:
-            if tile.is_number_tile():
-                suit_counts[tile.tile_type.value] += 1
-        
-        min_suit = min(suit_counts, key=suit_counts.get)
-        min_count = suit_counts[min_suit]
+        min_suit, min_count = self._fewest_suit(player)
         
         return f"💡 建议缺{min_suit}，你只有{min_count}张{min_suit}牌。"
     
@@ -674,13 +663,12 @@ class TrainerAI(BaseAI):
         
         # 找到优先级最高的牌
         priorities = []
+        counts34 = self._count_tiles34(player.hand_tiles)
         for tile in player.hand_tiles:
-            priority = self.calculate_discard_priority(player, tile)
+            priority = self.calculate_discard_priority(player, tile, counts34)
             priorities.append((tile, priority))
         
-        priorities.sort(key=lambda x: x[1], reverse=True)
-        
-        best_discard = priorities[0][0]
+        best_discard = max(priorities, key=lambda x: x[1])[0]
         advice.append(f"🎯 建议打出：{best_discard}")
         
         # 解释原因
@@ -714,25 +702,9 @@ class TrainerAI(BaseAI):
         
         return advice
     
-    def get_teaching_points(self) -> List[str]:
+    def get_teaching_points(self) -> Tuple[str, ...]:
         """获取教学要点"""
-        return [
-            "🎓 麻将基础：",
-            "• 四川麻将需要先选择缺一门（万、筒、条中的一种）",
-            "• 胡牌需要4个面子（刻子或顺子）+ 1个对子",
-            "• 刻子：三张相同的牌；顺子：同花色连续三张",
-            "",
-            "🎯 策略建议：",
-            "• 优先打出缺门的牌和孤张牌",
-            "• 注意观察其他玩家的打牌，避免让别人胡牌",
-            "• 杠牌分数高但有风险，要谨慎使用",
-            "• 碰牌相对安全，可以快速组成面子",
-            "",
-            "⚡ 特殊牌型：",
-            "• 碰碰胡：全部刻子，分数翻倍",
-            "• 清一色：同一花色，分数x4",
-            "• 字一色：全部字牌，分数x4"
-        ]
+        return _TEACHING_POINTS
     
     def analyze_game_situation(self, all_players: List[Player], 
                              discarded_tiles: List[Tile]) -> str:
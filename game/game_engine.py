@@ -7,9 +7,9 @@ import random
 from typing import List, Optional, Dict, Callable, Tuple, Any
 from enum import Enum
 
-from .tile import Tile, TileType
+from .tile import Tile, TileType, SUIT_TYPE_BY_NAME
 from .deck import Deck
-from .player import Player, PlayerType
+from .player import Player, PlayerType, Meld
 from rules.sichuan_rule import SichuanRule
 from rules.base_rule import BaseRule
 from utils.logger import setup_logger
@@ -384,8 +384,7 @@ class GameEngine:
         
         if missing_suit_str:
             # AI类提供了有效的缺门选择，转换为TileType
-            suit_map = {"万": TileType.WAN, "筒": TileType.TONG, "条": TileType.TIAO}
-            missing_suit = suit_map.get(missing_suit_str)
+            missing_suit = SUIT_TYPE_BY_NAME.get(missing_suit_str)
             if missing_suit:
                 self.submit_missing_suit(player_id, missing_suit)
                 self.logger.info(f"AI玩家 {player_id} 使用AI算法选择缺{missing_suit.value}")
@@ -709,7 +708,7 @@ class GameEngine:
             # 暗杠立即结算：所有仍在场且未胡牌玩家各付 2 分
             if success:
                 for p in self.players:
-                    if p == player or getattr(p, 'is_winner', False):
+                    if p == player or p.is_winner:
                         continue
                     p.score -= 2
                     player.score += 2
@@ -725,7 +724,7 @@ class GameEngine:
             # 贴杠立即结算：所有仍在场且未胡牌玩家各付 1 分（明杠计分）
             if success:
                 for p in self.players:
-                    if p == player or getattr(p, 'is_winner', False):
+                    if p == player or p.is_winner:
                         continue
                     p.score -= 1
                     player.score += 1
@@ -882,7 +881,7 @@ class GameEngine:
                 for other_player in self.players:
                     if (other_player != player and 
                         other_player != self.last_discard_player and
-                        not getattr(other_player, 'is_winner', False) and  # 避免重复处理
+                        not other_player.is_winner and  # 避免重复处理
                         self.rule.can_win(other_player, self.last_discarded_tile)):
                         # 其他玩家也能胡，也将胡牌加入其手牌
                         other_player.add_tile_to_hand(self.last_discarded_tile)
@@ -944,7 +943,7 @@ class GameEngine:
             
             # 为未胜利的玩家增加败场记录
             for p in self.players:
-                if not getattr(p, 'is_winner', False):
+                if not p.is_winner:
                     p.losses += 1
                 
             # 记录胡牌信息
@@ -1151,6 +1150,81 @@ class GameEngine:
             return True
         return self.state == GameState.GAME_OVER
     
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        保存出牌阶段的可变状态，供 restore 回滚（MCTS 模拟在同一个引擎上反复使用）
+        
+        牌对象不可变，只复制容器；副露在贴杠时会被原地修改，因此按值保存。
+        
+        Returns:
+            状态快照
+        """
+        players_state = []
+        for p in self.players:
+            players_state.append((
+                list(p.hand_tiles),
+                [(m.meld_type, list(m.tiles), m.exposed) for m in p.melds],
+                p.score, p.wins, p.losses,
+                p.is_winner, p.can_win, p.is_ready, p.missing_suit,
+                p.__dict__.get('last_score_change'),
+            ))
+        
+        return {
+            'state': self.state,
+            'current_player_index': self.current_player_index,
+            'last_discarded_tile': self.last_discarded_tile,
+            'last_discard_player': self.last_discard_player.position if self.last_discard_player else None,
+            'last_drawn_tile': self.last_drawn_tile,
+            'discard_pool': list(self.discard_pool),
+            'deck_tiles': list(self.deck.tiles) if self.deck else None,
+            'deck_discarded': list(self.deck.discarded_tiles) if self.deck else None,
+            'winners': list(self.winners),
+            'active_players': list(self.active_players),
+            'last_game_winners': list(self.last_game_winners),
+            'last_game_winner_tile': self.last_game_winner_tile,
+            'is_first_game': self.is_first_game,
+            'players': players_state,
+        }
+    
+    def restore(self, snapshot: Dict[str, Any]):
+        """
+        恢复到 snapshot 保存的状态，快照本身不会被修改，可重复使用
+        
+        Args:
+            snapshot: snapshot() 的返回值
+        """
+        for p, (hand_tiles, melds, score, wins, losses, is_winner, can_win,
+                is_ready, missing_suit, last_score_change) in zip(self.players, snapshot['players']):
+            p.hand_tiles = list(hand_tiles)
+            p.melds = [Meld(meld_type, list(tiles), exposed) for meld_type, tiles, exposed in melds]
+            p.score = score
+            p.wins = wins
+            p.losses = losses
+            p.is_winner = is_winner
+            p.can_win = can_win
+            p.is_ready = is_ready
+            p.missing_suit = missing_suit
+            if last_score_change is None:
+                p.__dict__.pop('last_score_change', None)
+            else:
+                p.last_score_change = last_score_change
+        
+        self.state = snapshot['state']
+        self.current_player_index = snapshot['current_player_index']
+        self.last_discarded_tile = snapshot['last_discarded_tile']
+        discard_player_index = snapshot['last_discard_player']
+        self.last_discard_player = self.players[discard_player_index] if discard_player_index is not None else None
+        self.last_drawn_tile = snapshot['last_drawn_tile']
+        self.discard_pool = list(snapshot['discard_pool'])
+        if self.deck:
+            self.deck.tiles = list(snapshot['deck_tiles'])
+            self.deck.discarded_tiles = list(snapshot['deck_discarded'])
+        self.winners = list(snapshot['winners'])
+        self.active_players = list(snapshot['active_players'])
+        self.last_game_winners = list(snapshot['last_game_winners'])
+        self.last_game_winner_tile = snapshot['last_game_winner_tile']
+        self.is_first_game = snapshot['is_first_game']
+    
     def get_game_state(self) -> Dict[str, Any]:
         """获取游戏状态信息"""
         return {
@@ -1251,11 +1325,9 @@ class GameEngine:
     
     def _remove_tile_from_discard_pool(self, tile: Tile) -> bool:
         """从公共出牌池中移除指定的牌"""
+        idx = tile.idx34
         for i, (pool_tile, player_name) in enumerate(self.discard_pool):
-            if (pool_tile.tile_type == tile.tile_type and 
-                pool_tile.value == tile.value and
-                pool_tile.feng_type == tile.feng_type and
-                pool_tile.jian_type == tile.jian_type):
+            if pool_tile.idx34 == idx:
                 # 找到匹配的牌，移除它
                 removed_tile, removed_player = self.discard_pool.pop(i)
                 self.logger.info(f"从出牌池移除: {removed_tile} (原打出者: {removed_player})")
@@ -5,7 +5,12 @@
 
 from typing import List, Optional, Set
 from enum import Enum
-from .tile import Tile
+from operator import attrgetter
+
+from .tile import Tile, SUIT_SLICE_BY_NAME
+
+# 手牌排序键，直接取牌的34索引
+_TILE_SORT_KEY = attrgetter('idx34')
 
 class PlayerType(Enum):
     """玩家类型"""
@@ -41,7 +46,7 @@ class Player:
         self.position = position  # 0:东, 1:南, 2:西, 3:北
         self.player_id = position  # 添加player_id属性，与position保持一致
         
-        # 手牌
+        # 手牌（hand_tiles属性，同时维护34索引计数hand_hist）
         self.hand_tiles: List[Tile] = []
         self.melds: List[Meld] = []  # 已组合的牌（碰、杠、吃）
         
@@ -62,43 +67,45 @@ class Player:
         self.on_tile_exchange_start = None  # 换三张开始回调
         self.on_missing_suit_selection_start = None  # 选择缺一门开始回调
         
+    @property
+    def hand_tiles(self) -> List[Tile]:
+        """手牌列表；增删手牌请通过Player的方法，以保持hand_hist同步"""
+        return self._hand_tiles
+    
+    @hand_tiles.setter
+    def hand_tiles(self, tiles: List[Tile]):
+        """整体替换手牌时重新统计hand_hist"""
+        self._hand_tiles = tiles
+        hand_hist = [0] * 34
+        for tile in tiles:
+            hand_hist[tile.idx34] += 1
+        self.hand_hist = hand_hist
+    
     def add_tile(self, tile: Tile):
         """添加一张牌到手牌"""
         self.hand_tiles.append(tile)
+        self.hand_hist[tile.idx34] += 1
         self.sort_hand()
     
     def add_tiles(self, tiles: List[Tile]):
         """添加多张牌到手牌"""
         self.hand_tiles.extend(tiles)
+        for tile in tiles:
+            self.hand_hist[tile.idx34] += 1
         self.sort_hand()
     
     def remove_tile(self, tile: Tile) -> bool:
         """从手牌中移除一张牌"""
         if tile in self.hand_tiles:
             self.hand_tiles.remove(tile)
+            self.hand_hist[tile.idx34] -= 1
             return True
         return False
     
     def sort_hand(self):
         """整理手牌"""
-        # 按照花色和数值排序
-        def tile_sort_key(tile: Tile):
-            type_order = {"万": 1, "筒": 2, "条": 3, "风": 4, "箭": 5}
-            feng_order = {"东": 1, "南": 2, "西": 3, "北": 4}
-            jian_order = {"中": 1, "发": 2, "白": 3}
-            
-            base = type_order.get(tile.tile_type.value, 0) * 100
-            
-            if tile.is_number_tile():
-                return base + tile.value
-            elif tile.tile_type.value == "风":
-                return base + feng_order.get(tile.feng_type.value, 0)
-            elif tile.tile_type.value == "箭":
-                return base + jian_order.get(tile.jian_type.value, 0)
-            
-            return base
-        
-        self.hand_tiles.sort(key=tile_sort_key)
+        # 按照花色和数值排序：34索引本身就是万、筒、条、东南西北、中发白的顺序
+        self.hand_tiles.sort(key=_TILE_SORT_KEY)
     
     def get_hand_count(self) -> int:
         """获取手牌数量"""
@@ -123,21 +130,20 @@ class Player:
         """检查是否可以暗杠，返回可暗杠的牌列表"""
         if tile:
             # 检查特定牌是否可以暗杠
-            count = sum(1 for t in self.hand_tiles if str(t) == str(tile))
+            count = sum(1 for t in self.hand_tiles if t.idx34 == tile.idx34)
             return [tile] if count >= 4 else []
         
         # 检查所有可以暗杠的牌
         tile_counts = {}
         for t in self.hand_tiles:
-            key = str(t)
-            tile_counts[key] = tile_counts.get(key, 0) + 1
+            tile_counts[t.idx34] = tile_counts.get(t.idx34, 0) + 1
         
         hidden_gang_tiles = []
-        for tile_str, count in tile_counts.items():
+        for idx34, count in tile_counts.items():
             if count >= 4:
                 # 找到对应的牌对象
                 for t in self.hand_tiles:
-                    if str(t) == tile_str:
+                    if t.idx34 == idx34:
                         hidden_gang_tiles.append(t)
                         break
         
@@ -148,13 +154,13 @@ class Player:
         if tile:
             # 检查特定牌是否可以贴杠
             # 1. 手牌中必须有这张牌
-            if not any(str(t) == str(tile) for t in self.hand_tiles):
+            if not any(t.idx34 == tile.idx34 for t in self.hand_tiles):
                 return []
             # 2. 必须已经有这张牌的碰（副露）
             for meld in self.melds:
                 if (meld.meld_type == MeldType.PENG and 
                     len(meld.tiles) >= 1 and 
-                    str(meld.tiles[0]) == str(tile)):
+                    meld.tiles[0].idx34 == tile.idx34):
                     return [tile]
             return []
         
@@ -167,7 +173,7 @@ class Player:
                 peng_tile = meld.tiles[0]  # 碰的牌（所有牌都相同）
                 # 检查手牌中是否有相同的牌进行贴杠
                 for hand_tile in self.hand_tiles:
-                    if str(hand_tile) == str(peng_tile):
+                    if hand_tile.idx34 == peng_tile.idx34:
                         add_gang_tiles.append(hand_tile)
                         break  # 一个碰只能贴杠一次，找到就跳出
         
@@ -226,6 +232,7 @@ class Player:
         for t in self.hand_tiles[:]:
             if t == tile and removed_count < 2:
                 self.hand_tiles.remove(t)
+                self.hand_hist[t.idx34] -= 1
                 peng_tiles.append(t)
                 removed_count += 1
         
@@ -244,6 +251,7 @@ class Player:
         for t in self.hand_tiles[:]:
             if t == tile and removed_count < 3:
                 self.hand_tiles.remove(t)
+                self.hand_hist[t.idx34] -= 1
                 gang_tiles.append(t)
                 removed_count += 1
         
@@ -260,8 +268,9 @@ class Player:
         gang_tiles = []
         removed_count = 0
         for t in self.hand_tiles[:]:
-            if str(t) == str(tile) and removed_count < 4:
+            if t.idx34 == tile.idx34 and removed_count < 4:
                 self.hand_tiles.remove(t)
+                self.hand_hist[t.idx34] -= 1
                 gang_tiles.append(t)
                 removed_count += 1
         
@@ -271,8 +280,7 @@ class Player:
             return True
         else:
             # 如果移除失败，恢复手牌
-            self.hand_tiles.extend(gang_tiles)
-            self.sort_hand()
+            self.add_tiles(gang_tiles)
             return False
     
     def make_chi(self, tiles: List[Tile]) -> bool:
@@ -289,6 +297,7 @@ class Player:
             if tile not in self.hand_tiles:
                 return False
             self.hand_tiles.remove(tile)
+            self.hand_hist[tile.idx34] -= 1
         
         # 添加到组合中
         self.melds.append(Meld(MeldType.CHI, tiles, exposed=True))
@@ -303,12 +312,17 @@ class Player:
         if not self.missing_suit:
             return True
         
-        # 检查手牌和组合中是否还有指定花色的牌
-        all_tiles = self.hand_tiles[:]
-        for meld in self.melds:
-            all_tiles.extend(meld.tiles)
+        # 手牌直接看hand_hist中该花色的9格
+        missing_slice = SUIT_SLICE_BY_NAME.get(self.missing_suit)
+        if missing_slice is not None:
+            if any(self.hand_hist[missing_slice]):
+                return False
+            tiles_to_check = [tile for meld in self.melds for tile in meld.tiles]
+        else:
+            tiles_to_check = self.hand_tiles + [tile for meld in self.melds for tile in meld.tiles]
         
-        for tile in all_tiles:
+        # 检查组合中是否还有指定花色的牌
+        for tile in tiles_to_check:
             if tile.tile_type.value == self.missing_suit:
                 return False
         
@@ -342,6 +356,7 @@ class Player:
     def reset(self):
         """重置玩家状态"""
         self.hand_tiles.clear()
+        self.hand_hist = [0] * 34
         self.melds.clear()
         self.is_ready = False
         self.is_winner = False
@@ -361,7 +376,7 @@ class Player:
         for i, meld in enumerate(self.melds):
             if (meld.meld_type == MeldType.PENG and 
                 len(meld.tiles) >= 1 and 
-                str(meld.tiles[0]) == str(tile)):
+                meld.tiles[0].idx34 == tile.idx34):
                 # 将这张牌加入到碰中形成杠
                 meld.tiles.append(tile)
                 # 改变类型为杠
@@ -4,8 +4,8 @@
 """
 
 from enum import Enum
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 import os
 
 class TileType(Enum):
@@ -29,6 +29,22 @@ class JianType(Enum):
     FA = "发"
     BAI = "白"
 
+# 34种牌的统一索引：0-8万，9-17筒，18-26条，27-30东南西北，31-33中发白
+_SUIT_BASE_INDEX = {TileType.WAN: 0, TileType.TONG: 9, TileType.TIAO: 18}
+_HONOR_INDEX = {feng_type: 27 + i for i, feng_type in enumerate(FengType)}
+_HONOR_INDEX.update({jian_type: 31 + i for i, jian_type in enumerate(JianType)})
+
+# 按34索引的幺九牌判断：各花色的1和9，以及全部字牌
+_TERMINAL_BY_INDEX = tuple([True] + [False] * 7 + [True]) * 3 + (True,) * 7
+
+# 花色编号即 idx34 // 9：0万，1筒，2条，3字牌
+SUIT_NAMES = ("万", "筒", "条")
+SUIT_ID_BY_NAME = {name: suit_id for suit_id, name in enumerate(SUIT_NAMES)}
+# 缺门名称到花色类型的映射，各处共用同一份，不在每次调用时重建
+SUIT_TYPE_BY_NAME = {name: TileType(name) for name in SUIT_NAMES}
+# 缺门名称到34格计数中该花色切片的映射，用于直接检查计数数组
+SUIT_SLICE_BY_NAME = {name: slice(suit_id * 9, suit_id * 9 + 9) for suit_id, name in enumerate(SUIT_NAMES)}
+
 @dataclass(frozen=True)
 class Tile:
     """麻将牌类"""
@@ -36,6 +52,8 @@ class Tile:
     value: int = 0  # 1-9 for 万筒条, 0 for 风箭
     feng_type: Optional[FengType] = None
     jian_type: Optional[JianType] = None
+    idx34: int = field(init=False, repr=False, compare=False)  # 0-33的牌索引，用于计数数组
+    _symbol: str = field(init=False, repr=False, compare=False)  # 缓存的Unicode符号，str()直接返回
     
     def __post_init__(self):
         """初始化后验证"""
@@ -48,10 +66,30 @@ class Tile:
         elif self.tile_type == TileType.JIAN:
             if self.jian_type is None:
                 raise ValueError("箭牌必须指定jian_type")
+        
+        # 预计算34索引（冻结的dataclass需要通过object.__setattr__赋值）
+        if self.tile_type in _SUIT_BASE_INDEX:
+            idx34 = _SUIT_BASE_INDEX[self.tile_type] + self.value - 1
+        elif self.tile_type == TileType.FENG:
+            idx34 = _HONOR_INDEX[self.feng_type]
+        else:
+            idx34 = _HONOR_INDEX[self.jian_type]
+        object.__setattr__(self, "idx34", idx34)
+        object.__setattr__(self, "_symbol", self.get_unicode_symbol())
+    
+    def __eq__(self, other):
+        """比较牌面：idx34与(花色, 点数, 风, 箭)一一对应，比较整数即可"""
+        if other.__class__ is self.__class__:
+            return self.idx34 == other.idx34
+        return NotImplemented
+    
+    def __hash__(self):
+        """哈希取idx34，与__eq__一致，且不受进程间字符串哈希随机化影响"""
+        return self.idx34
     
     def __str__(self):
         """字符串表示 - 使用麻将Unicode符号"""
-        return self.get_unicode_symbol()
+        return self._symbol
     
     def __repr__(self):
         return self.__str__()
@@ -100,18 +138,16 @@ class Tile:
         return "未知牌"
     
     def is_number_tile(self) -> bool:
-        """是否为数字牌"""
-        return self.tile_type in [TileType.WAN, TileType.TONG, TileType.TIAO]
+        """是否为数字牌（idx34 0-26）"""
+        return self.idx34 < 27
     
     def is_honor_tile(self) -> bool:
-        """是否为字牌（风、箭）"""
-        return self.tile_type in [TileType.FENG, TileType.JIAN]
+        """是否为字牌（风、箭，idx34 27-33）"""
+        return self.idx34 >= 27
     
     def is_terminal(self) -> bool:
-        """是否为幺九牌"""
-        if self.is_number_tile():
-            return self.value in [1, 9]
-        return self.is_honor_tile()
+        """是否为幺九牌（包括字牌）"""
+        return _TERMINAL_BY_INDEX[self.idx34]
     
     def is_same_suit(self, other: 'Tile') -> bool:
         """是否同花色"""
@@ -144,6 +180,13 @@ for feng_type in FengType:
 for jian_type in JianType:
     ALL_TILES.append(Tile(TileType.JIAN, jian_type=jian_type))
 
+def count_suits(tiles) -> List[int]:
+    """统计各花色的张数，返回 [万, 筒, 条, 字牌]"""
+    counts = [0, 0, 0, 0]
+    for tile in tiles:
+        counts[tile.idx34 // 9] += 1
+    return counts
+
 def create_tile_from_string(tile_str: str) -> Tile:
     """从字符串创建麻将牌"""
     if len(tile_str) == 2:
@@ -9,7 +9,7 @@ https://ppnav.com/38.html
 
 from typing import List, Dict, Optional, Tuple
 from .base_rule import BaseRule, WinPattern
-from game.tile import Tile, TileType
+from game.tile import Tile, TileType, SUIT_SLICE_BY_NAME
 from game.player import Player
 
 class SichuanRule(BaseRule):
@@ -95,27 +95,19 @@ class SichuanRule(BaseRule):
     
     def _check_missing_suit(self, player: Player) -> bool:
         """检查是否符合缺一门规则"""
-        if not hasattr(player, 'missing_suit') or not player.missing_suit:
+        # 未选择缺门时 missing_suit 为None，查不到花色切片
+        missing_slice = SUIT_SLICE_BY_NAME.get(getattr(player, 'missing_suit', None))
+        if missing_slice is None:
             return False
         
-        missing_suit_type = {
-            "万": TileType.WAN,
-            "筒": TileType.TONG, 
-            "条": TileType.TIAO
-        }.get(player.missing_suit)
-        
-        if not missing_suit_type:
+        # 检查手牌中是否有缺门的牌：直接看hand_hist中该花色的9格
+        if any(player.hand_hist[missing_slice]):
             return False
         
-        # 检查手牌中是否有缺门的牌
-        for tile in player.hand_tiles:
-            if tile.tile_type == missing_suit_type:
-                return False
-        
         # 检查副露中是否有缺门的牌
         for meld in player.melds:
             for tile in meld.tiles:
-                if tile.tile_type == missing_suit_type:
+                if missing_slice.start <= tile.idx34 < missing_slice.stop:
                     return False
         
         return True
@@ -169,7 +161,7 @@ class SichuanRule(BaseRule):
         # 血战到底计分规则
         if is_self_draw:
             # 自摸：所有仍在场且未胡牌的玩家付钱给胜者
-            payers = [p for p in players if p != winner and not getattr(p, 'is_winner', False)]
+            payers = [p for p in players if p != winner and not p.is_winner]
             for payer in payers:
                 scores[payer.name] = -final_point
                 scores[winner.name] += final_point
@@ -180,7 +172,7 @@ class SichuanRule(BaseRule):
                 scores[winner.name] = final_point
             else:
                 # 异常情况保护：无放炮者信息时按自摸处理
-                payers = [p for p in players if p != winner and not getattr(p, 'is_winner', False)]
+                payers = [p for p in players if p != winner and not p.is_winner]
                 for payer in payers:
                     scores[payer.name] = -final_point
                     scores[winner.name] += final_point
@@ -431,21 +423,13 @@ class SichuanRule(BaseRule):
             return False
         
         # 四川麻将特殊规则：如果已经选择了缺门，需要优先打出缺门的牌
-        if hasattr(player, 'missing_suit') and player.missing_suit:
-            missing_suit_type = {
-                "万": TileType.WAN,
-                "筒": TileType.TONG,
-                "条": TileType.TIAO
-            }.get(player.missing_suit)
+        missing_slice = SUIT_SLICE_BY_NAME.get(getattr(player, 'missing_suit', None))
+        if missing_slice is not None:
+            # 检查手牌中是否还有缺门的牌
+            has_missing_suit_tiles = any(player.hand_hist[missing_slice])
             
-            if missing_suit_type:
-                # 检查手牌中是否还有缺门的牌
-                has_missing_suit_tiles = any(
-                    t.tile_type == missing_suit_type for t in player.hand_tiles
-                )
-                
-                # 如果有缺门牌，必须优先打出缺门牌
-                if has_missing_suit_tiles and tile.tile_type != missing_suit_type:
-                    return False
+            # 如果有缺门牌，必须优先打出缺门牌
+            if has_missing_suit_tiles and not missing_slice.start <= tile.idx34 < missing_slice.stop:
+                return False
         
         return True 
\ No newline at end of file
@@ -28,6 +28,7 @@ from ai.shanten_ai import ShantenAI, ShantenCalculator, UkeireCalculator, TileEf
 from ai.simple_ai import SimpleAI
 from ai.aggressive_ai import AggressiveAI
 from ai.mcts_ai import MctsAI
+from rules.national_rule import NationalRule
 
 def create_test_tiles(tile_strings: List[str]) -> List[Tile]:
     """从字符串列表创建测试牌"""
@@ -402,6 +403,75 @@ def test_tenpai_pattern_classification():
                 print(f"      - {tile_name}: {count}张")
         print()
 
+def test_simple_ai_win_check():
+    """测试SimpleAI胡牌判断：顺子能组成面子，缺门的牌仍然不能胡"""
+    print("🎯 测试SimpleAI胡牌判断")
+    print("=" * 50)
+    
+    ai = SimpleAI("medium")
+    player = Player("测试玩家", PlayerType.AI_MEDIUM, 0)
+    # 123万 456万 123筒 777筒 + 东东（摸到第二张东）
+    player.hand_tiles = create_test_tiles([
+        "1万", "2万", "3万", "4万", "5万", "6万", "1筒", "2筒", "3筒", "7筒", "7筒", "7筒", "东"
+    ])
+    win_tile = create_test_tiles(["东"])[0]
+    
+    # 缺条：手牌中没有条，带顺子的手牌可以胡
+    player.missing_suit = "条"
+    assert ai._can_actually_win(player, win_tile), "带顺子的手牌应该可以胡"
+    print(f"✅ 缺条 + 摸{win_tile}: 可以胡牌")
+    
+    # 缺筒：手牌中还有筒，不能胡
+    player.missing_suit = "筒"
+    assert not ai._can_actually_win(player, win_tile), "手牌有缺门的牌不应该胡"
+    print(f"✅ 缺筒 + 摸{win_tile}: 不能胡牌")
+    print()
+
+def test_national_rule_valid_hand():
+    """测试国标规则的胡牌牌型校验：能组成顺子，差一张则不成立"""
+    print("🎯 测试国标规则胡牌牌型校验")
+    print("=" * 50)
+    
+    rule = NationalRule()
+    winning_hand = create_test_tiles([
+        "1万", "2万", "3万", "4万", "5万", "6万", "1筒", "2筒", "3筒", "7条", "7条", "7条", "东", "东"
+    ])
+    assert rule.is_valid_hand(winning_hand), "带顺子的手牌应该是有效胡牌牌型"
+    print(f"✅ {' '.join(str(t) for t in winning_hand)}: 有效")
+    
+    # 6万换成7万，456万不再成顺子
+    off_by_one = create_test_tiles([
+        "1万", "2万", "3万", "4万", "5万", "7万", "1筒", "2筒", "3筒", "7条", "7条", "7条", "东", "东"
+    ])
+    assert not rule.is_valid_hand(off_by_one), "差一张的手牌不应该是有效胡牌牌型"
+    print(f"✅ {' '.join(str(t) for t in off_by_one)}: 无效")
+    print()
+
+def test_tile_danger_evaluation():
+    """测试危险度评估：出牌池非空时，未出过的牌也能正常评分"""
+    print("🎯 测试危险度评估")
+    print("=" * 50)
+    
+    discard_pool = [(tile, "玩家1") for tile in create_test_tiles(["1万"])]
+    genbutsu, suji, middle = create_test_tiles(["1万", "4万", "5万"])
+    
+    # 现物安全；4万是1万的筋牌：0.7 × 0.7 + 0.2；5万：0.7 + 0.2
+    assert TileEfficiencyAnalyzer.evaluate_tile_danger_level(genbutsu, discard_pool, [], 1) == 0.0
+    assert abs(TileEfficiencyAnalyzer.evaluate_tile_danger_level(suji, discard_pool, [], 1) - 0.69) < 1e-9
+    assert abs(TileEfficiencyAnalyzer.evaluate_tile_danger_level(middle, discard_pool, [], 1) - 0.9) < 1e-9
+    print(f"✅ {genbutsu}: 0.00, {suji}: 0.69, {middle}: 0.90")
+    
+    # 防守分析同样要能处理不在出牌池中的牌
+    ai = ShantenAI("hard")
+    player = Player("测试玩家", PlayerType.AI_HARD, 0)
+    game_context = {"discard_pool": discard_pool, "all_visible_tiles": [], "round_number": 1}
+    analysis = ai.provide_defense_analysis(player, [middle, suji, genbutsu], game_context)
+    assert f"1. {genbutsu} - 🟢安全 (0%)" in analysis
+    assert f"2. {suji} - 🔴危险 (69%)" in analysis
+    assert f"推荐: 优先考虑 {genbutsu}" in analysis
+    print(analysis)
+    print()
+
 def main():
     """主测试函数"""
     print("🀄 ShantenAI 功能测试")
@@ -415,6 +485,9 @@ def main():
         test_shanten_calculation()
         test_ukeire_calculation()
         test_tile_efficiency_analysis()
+        test_simple_ai_win_check()
+        test_national_rule_valid_hand()
+        test_tile_danger_evaluation()
         
         # AI决策测试
         test_ai_decision_quality()